@@ -0,0 +1,158 @@
+"""Batch simulation of many games of Hog at once.
+
+play_many advances a whole batch of games together, one round at a time.
+Every game in the batch starts with player 0, so all unfinished games share
+the same current player in any given round.  Strategies are compiled once
+into flat tables indexed by score pair (see compiled.py), and the rules and
+dice are inlined into a single loop instead of going through other,
+num_allowed_dice, select_dice, take_turn and roll_dice for every turn.
+
+The rules applied are exactly those of hog.play: Hog Tied, Hog Wild (which
+also applies when both scores are 0), Free Bacon, Touchdown and 49ers, read
+from the tables of a HogRules object (see rules.py), which can also describe
+a variant of the game.
+"""
+
+from array import array
+import random
+import time
+
+from compiled import strategy_table
+import metrics
+from rules import HogRules
+
+def play_many(strategy0, strategy1, n_games, goal=100, seed=None,
+              common=False, antithetic=False, recorder=None, rules=None):
+    """Simulate N_GAMES games and return an array of their winners.
+
+    Each entry of the result is 0 if the first player won that game and 1
+    otherwise, just like the return value of hog.play.
+
+    strategy0:  The strategy function for player 0, who plays first.
+    strategy1:  The strategy function for player 1, who plays second.
+    n_games:    The number of games to simulate.
+    goal:       The score that ends a game.
+    seed:       Seed for the random dice, for reproducible batches.
+    common:     Whether each player of each game has its own random stream,
+                seeded by SEED, the position of the game in the batch and the
+                player, so that the first (or second) player in game i of any
+                batch with the same SEED rolls the same dice (common random
+                numbers).
+    antithetic: Whether games come in pairs that share their random streams,
+                where every die of the second game shows the opposite face
+                (sides + 1 - k) of the first.  Implies COMMON.
+    recorder:   An optional gamelog.GameRecorder that records every turn.
+                The games of the batch are numbered consecutively, but their
+                turns are recorded one round at a time.  Without a recorder,
+                the metrics collector records the turns, if metrics are on.
+                Recorded turns are scored by RULES.
+    rules:      The HogRules of the game, instead of the standard rules for
+                GOAL.
+
+    >>> winners = play_many(lambda s, o: 5, lambda s, o: 5, 50, seed=61)
+    >>> len(winners), set(winners) <= {0, 1}
+    (50, True)
+    >>> list(play_many(lambda s, o: 0, lambda s, o: 0, 3))
+    [0, 0, 0]
+    >>> from exact import win_probability
+    >>> variant, fives = HogRules(goal=50, sides=8, pig_out=False), lambda s, o: 5
+    >>> rate = 1 - sum(play_many(fives, fives, 4000, seed=61, rules=variant)) / 4000
+    >>> abs(rate - win_probability(fives, fives, rules=variant)) < 0.03
+    True
+    >>> ones = lambda s, o: 1
+    >>> list(play_many(ones, ones, 8, seed=1, common=True)[:4]) == list(
+    ...     play_many(ones, ones, 4, seed=1, common=True))
+    True
+    """
+    if rules is None:
+        rules = HogRules(goal)
+    goal = rules.goal
+    collector = metrics.collector
+    if collector is not None:
+        start = time.perf_counter()
+        if recorder is None:
+            recorder = collector
+    tables = (strategy_table(strategy0, goal, rules.max_dice),
+              strategy_table(strategy1, goal, rules.max_dice))
+    if collector is not None:
+        collector.seconds['compile'] += time.perf_counter() - start
+        start = time.perf_counter()
+    if common or antithetic:
+        pairs = 2 if antithetic else 1
+        rands = tuple([random.Random('{0}/{1}/{2}'.format(seed, game // pairs, who)).random
+                       for game in range(n_games)]
+                      for who in (0, 1))
+    else:
+        rands = ([random.Random(seed).random] * n_games,) * 2
+    rule_tables = rules.tables()
+    allowed_dice, dice_sides, free_bacon, ones_lose, touchdown = rule_tables[1:]
+
+    # The face shown by a die for each index int(u * sides), where u is a
+    # uniform random number, and the opposite face for antithetic games.
+    forward = {sides: tuple(range(1, sides + 1)) for sides in set(dice_sides)}
+    if antithetic:
+        backward = {sides: die[::-1] for sides, die in forward.items()}
+        faces = [backward if game % 2 else forward for game in range(n_games)]
+    else:
+        faces = [forward] * n_games
+    record = recorder.record_turn if recorder is not None else None
+    if record is not None:
+        from gamelog import turn_flags
+    scores = ([0] * n_games, [0] * n_games)
+    winners = array('b', bytes(n_games))
+
+    active = range(n_games)
+    who = 0
+    while active:
+        table, my_rands = tables[who], rands[who]
+        mine, theirs = scores[who], scores[1 - who]
+        still_playing = []
+        for game in active:
+            score, opponent_score = mine[game], theirs[game]
+            total = score + opponent_score
+            requested = num_rolls = table[score * goal + opponent_score]
+
+            if num_rolls > allowed_dice[total]:       # Hog Tied
+                num_rolls = allowed_dice[total]
+
+            if num_rolls == 0:                        # Free Bacon
+                points = free_bacon[opponent_score]
+                rolls, sides = (), 0
+            else:
+                sides = dice_sides[total]             # Hog Wild
+                rand, die = my_rands[game], faces[game][sides]
+                if record is None:
+                    points = 0
+                    pig_out = False
+                    for _ in range(num_rolls):
+                        roll = die[int(rand() * sides)]
+                        if roll == 1:
+                            pig_out = True
+                        points += roll
+                else:
+                    rolls = [die[int(rand() * sides)] for _ in range(num_rolls)]
+                    points = sum(rolls)
+                    pig_out = 1 in rolls
+                if pig_out and ones_lose[score]:      # Pig Out unless 49ers
+                    points = 1
+                points = touchdown[points]            # Touchdown
+
+            if record is not None:
+                record(who, requested, num_rolls, score, opponent_score,
+                       rolls, sides, game, points,
+                       turn_flags(requested, num_rolls, rolls, score,
+                                  opponent_score, points, rules, rule_tables))
+
+            score += points
+            mine[game] = score
+            if score >= goal:
+                winners[game] = who
+            else:
+                still_playing.append(game)
+        active = still_playing
+        who = 1 - who
+    if recorder is not None:
+        recorder.end_game(n_games)
+    if collector is not None:
+        collector.seconds['dice'] += time.perf_counter() - start
+    return winners
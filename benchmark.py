@@ -0,0 +1,119 @@
+"""Benchmarks of the simulator, the dice and the strategies.
+
+A benchmark is a function that performs a given number of operations, such
+as games or dice rolls.  Each benchmark is run a few times to warm up and then
+timed over several trials, and its result is the median number of operations
+per second over the trials, along with every trial's rate.
+
+Results are plain JSON, so a run can be saved as a baseline and later runs
+compared against it: any benchmark whose median rate fell by more than the
+tolerance is reported as a regression.  Rates depend on the machine, so a
+baseline is only meaningful on the machine that recorded it.
+"""
+
+from collections import namedtuple
+import gc
+import json
+import platform
+import time
+
+TRIALS = 5
+WARMUP = 1
+TOLERANCE = 0.15    # Fraction by which a rate may fall before it regresses.
+
+Benchmark = namedtuple('Benchmark', ['name', 'unit', 'fn', 'operations',
+                                     'trials', 'warmup'])
+Benchmark.__new__.__defaults__ = (TRIALS, WARMUP)
+Benchmark.__doc__ = """A benchmark NAME in which FN(OPERATIONS) performs
+OPERATIONS operations of UNIT, such as 'games' or 'rolls'."""
+
+def time_trials(fn, operations, trials=TRIALS, warmup=WARMUP):
+    """Return the rates, in operations per second, of TRIALS timed calls of
+    FN(OPERATIONS), after WARMUP untimed calls.  Garbage collection is off
+    while timing, as in timeit.
+
+    >>> rates = time_trials(lambda n: sum(range(n)), 1000, trials=3)
+    >>> len(rates), min(rates) > 0
+    (3, True)
+    """
+    for _ in range(warmup):
+        fn(operations)
+    rates = []
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(trials):
+            start = time.perf_counter()
+            fn(operations)
+            rates.append(operations / (time.perf_counter() - start))
+    finally:
+        if collecting:
+            gc.enable()
+    return rates
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+def run_benchmarks(benchmarks, report=print):
+    """Run BENCHMARKS and return their results, reporting each result with
+    REPORT as soon as it is known.
+
+    >>> results = run_benchmarks([Benchmark('sum', 'numbers',
+    ...                                     lambda n: sum(range(n)), 1000, 3)],
+    ...                          report=None)
+    >>> sorted(results['results']['sum'])
+    ['median', 'operations', 'rates', 'unit']
+    """
+    results = {}
+    for benchmark in benchmarks:
+        rates = time_trials(benchmark.fn, benchmark.operations,
+                            benchmark.trials, benchmark.warmup)
+        results[benchmark.name] = {'unit': benchmark.unit,
+                                   'operations': benchmark.operations,
+                                   'rates': rates, 'median': _median(rates)}
+        if report is not None:
+            report(format_result(benchmark.name, results[benchmark.name]))
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'results': results}
+
+def format_result(name, result):
+    """Return a line describing the RESULT of the benchmark NAME."""
+    median, unit = result['median'], result['unit']
+    seconds = 1 / median
+    if seconds >= 1:
+        each = '{0:>10.2f} s/{1}'.format(seconds, unit.rstrip('s'))
+    else:
+        each = '{0:>10.2f} us/{1}'.format(seconds * 1e6, unit.rstrip('s'))
+    return '{0:<45} {1:>14,.1f} {2}/s  {3}'.format(name, median, unit, each)
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return a list of (name, baseline_rate, rate) for every benchmark in
+    both RESULTS and BASELINE whose median rate fell by more than TOLERANCE.
+
+    >>> old = {'results': {'play': {'median': 100.0}, 'roll': {'median': 5.0}}}
+    >>> new = {'results': {'play': {'median': 80.0}, 'roll': {'median': 4.9}}}
+    >>> compare(new, old)
+    [('play', 100.0, 80.0)]
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        if name in baseline['results']:
+            before = baseline['results'][name]['median']
+            if result['median'] < before * (1 - tolerance):
+                regressions.append((name, before, result['median']))
+    return regressions
+
+def save(results, path):
+    """Write RESULTS to the JSON file at PATH."""
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+def load(path):
+    """Return results read from the JSON file at PATH."""
+    with open(path) as results_file:
+        return json.load(results_file)
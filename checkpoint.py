@@ -0,0 +1,92 @@
+"""A store of finished games, so that long experiments can resume.
+
+Matches are played in shards (see parallel.py), and the dice of every shard
+are seeded from a master seed, the strategies and the number of the shard.
+A ResultStore appends the wins of every finished shard to a JSONL file under
+a key made of the fingerprints of both strategies, the goal, the number of
+games and the shard's seed.  A rerun with the same master seed finds every
+shard it already played in the store and only plays the missing ones, and the
+wins of a match are merged from its stored and new shards, so an interrupted
+sweep picks up where it stopped and reaches the same results.
+
+The store also keeps the master seed of the experiments that use it.  To
+start over with new dice, delete the file.
+"""
+
+import json
+import os
+import random
+
+class ResultStore:
+    """The finished shards recorded in the JSONL file at PATH.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'results.jsonl')
+    >>> store = ResultStore(path)
+    >>> store.put('a/b/100/1000/7/0/0', 512)
+    >>> seed = store.seed()
+    >>> store = ResultStore(path)
+    >>> store.get('a/b/100/1000/7/0/0'), store.get('b/a/100/1000/7/1/0'), store.seed() == seed
+    (512, None, True)
+
+    A line cut short by a crash is skipped, and the next record starts on a
+    line of its own.
+
+    >>> with open(path, 'a') as store_file:
+    ...     _ = store_file.write('{"key": "c", "wi')
+    >>> ResultStore(path).put('d', 3)
+    >>> store = ResultStore(path)
+    >>> store.get('c'), store.get('d'), len(store)
+    (None, 3, 2)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        self.master_seed = None
+        self.cut_short = False  # Whether the file ends in an unfinished line.
+        if os.path.exists(path):
+            with open(path) as store_file:
+                for line in store_file:
+                    self.cut_short = not line.endswith('\n')
+                    try:
+                        record = json.loads(line)
+                    except ValueError:      # A line cut short by a crash.
+                        continue
+                    if 'seed' in record:
+                        self.master_seed = record['seed']
+                    else:
+                        self.results[record['key']] = record['wins']
+
+    def get(self, key):
+        """Return the wins stored under KEY, or None."""
+        return self.results.get(key)
+
+    def put(self, key, wins):
+        """Store WINS under KEY."""
+        self.results[key] = wins
+        self._append({'key': key, 'wins': wins})
+
+    def seed(self):
+        """Return the master seed kept in the store, choosing one first if
+        there is none."""
+        if self.master_seed is None:
+            self.master_seed = random.getrandbits(64)
+            self._append({'seed': self.master_seed})
+        return self.master_seed
+
+    def __len__(self):
+        return len(self.results)
+
+    def _append(self, record):
+        with open(self.path, 'a') as store_file:
+            if self.cut_short:
+                store_file.write('\n')
+                self.cut_short = False
+            store_file.write(json.dumps(record) + '\n')
+
+def shard_key(first, second, goal, n_games, seed, common=False, antithetic=False):
+    """Return the store key of a shard of N_GAMES games to GOAL between the
+    strategies with fingerprints FIRST and SECOND, seeded by SEED."""
+    return '/'.join([first, second, str(goal), str(n_games), str(seed),
+                     str(int(common)), str(int(antithetic))])
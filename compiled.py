@@ -0,0 +1,71 @@
+"""Strategies compiled into flat lookup tables.
+
+A compiled strategy evaluates a strategy function once for every pair of
+scores below the goal and keeps the results in an array of unsigned bytes.
+It is still a strategy: calling it with two scores is a single index into its
+table.  The batch engine, the exact evaluator and the solver read the table
+of a compiled strategy directly instead of tabulating it again.
+"""
+
+from array import array
+from hashlib import sha256
+
+from outcomes import MAX_NUM_ROLLS
+
+class CompiledStrategy:
+    """A strategy stored as a table of dice counts indexed by score pair.
+
+    The number of dice for (score, opponent_score) is at index
+    score * goal + opponent_score of TABLE.
+    """
+
+    def __init__(self, table, goal=100):
+        assert len(table) == goal * goal, 'Table must cover every score pair'
+        self.table = table
+        self.goal = goal
+
+    def __call__(self, score, opponent_score):
+        return self.table[score * self.goal + opponent_score]
+
+    def fingerprint(self):
+        """Return a short hex string that identifies the decisions of this
+        strategy: two strategies with the same fingerprint always roll the
+        same number of dice.
+
+        >>> CompiledStrategy(array('B', [5] * 4), 2).fingerprint()
+        'fcd32ee2e0a59d68'
+        """
+        digest = sha256(str(self.goal).encode() + b':' + self.table.tobytes())
+        return digest.hexdigest()[:16]
+
+    def __repr__(self):
+        return 'CompiledStrategy(<{0} entries>, goal={1})'.format(
+            len(self.table), self.goal)
+
+def compile_strategy(strategy, goal=100, max_dice=MAX_NUM_ROLLS):
+    """Return STRATEGY compiled into a CompiledStrategy for scores below GOAL.
+
+    Values above MAX_DICE are stored as MAX_DICE, which is what play would
+    roll instead.  STRATEGY must be a deterministic function of the two
+    scores.  A strategy already compiled for GOAL is returned as it is.
+
+    >>> compiled = compile_strategy(lambda score, opponent_score: score, 20)
+    >>> compiled(3, 7), compiled(15, 0)
+    (3, 10)
+    >>> compile_strategy(compiled, 20) is compiled
+    True
+    """
+    if isinstance(strategy, CompiledStrategy) and strategy.goal == goal:
+        return strategy
+    table = array('B')
+    for score in range(goal):
+        for opponent_score in range(goal):
+            num_rolls = strategy(score, opponent_score)
+            assert num_rolls >= 0, 'Cannot roll a negative number of dice.'
+            table.append(min(num_rolls, max_dice))
+    return CompiledStrategy(table, goal)
+
+def strategy_table(strategy, goal=100, max_dice=MAX_NUM_ROLLS):
+    """Return the lookup table of STRATEGY for scores below GOAL, compiling it
+    first unless it is already compiled for GOAL."""
+    return compile_strategy(strategy, goal, max_dice).table
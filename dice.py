@@ -12,18 +12,117 @@ Types of dice:
     cycle among a fixed set of values when rolled.
 """
 
-from random import randint
+from random import Random
 
-def make_fair_dice(sides):
+BLOCK_SIZE = 4096   # Number of outcomes a fair die draws at once.
+
+class FairDice:
+    """A die that returns 1 to SIDES with equal chance.
+
+    Outcomes are drawn from the die's own random number generator in blocks
+    of BLOCK_SIZE and served from a buffer, which is much faster than drawing
+    each one separately.  Rolling the same seeded die always gives the same
+    outcomes, whether they are rolled one at a time or with roll_many.
+
+    >>> dice = FairDice(6, seed=61)
+    >>> rolls = [dice() for _ in range(5)]
+    >>> dice.seed(61)
+    >>> dice.roll_many(5) == rolls
+    True
+    >>> state = dice.getstate()
+    >>> rolls = dice.roll_many(5000)
+    >>> dice.setstate(state)
+    >>> dice.roll_many(5000) == rolls
+    True
+    """
+
+    def __init__(self, sides, seed=None, block_size=BLOCK_SIZE):
+        assert type(sides) == int and sides >= 1, 'Illegal value for sides'
+        self.sides = sides
+        self.block_size = block_size
+        self._faces = range(1, sides + 1)
+        self._random = Random()
+        self.seed(seed)
+
+    def __call__(self):
+        try:
+            return self._pop()
+        except IndexError:
+            self._refill(1)
+            return self._pop()
+
+    def roll_many(self, k):
+        """Return a list of the next K outcomes of this die."""
+        if len(self._buffer) < k:
+            self._refill(k)
+        outcomes = self._buffer[len(self._buffer) - k:]
+        del self._buffer[len(self._buffer) - k:]
+        outcomes.reverse()
+        return outcomes
+
+    def _refill(self, k):
+        """Draw blocks until at least K outcomes are buffered.  Outcomes are
+        served from the end of the buffer, so new blocks go in front."""
+        blocks = -(-(k - len(self._buffer)) // self.block_size)
+        buffer = []
+        for block in reversed([self._random.choices(self._faces, k=self.block_size)
+                               for _ in range(blocks)]):
+            buffer += block
+        buffer += self._buffer
+        self._set_buffer(buffer)
+
+    def _set_buffer(self, buffer):
+        self._buffer = buffer
+        self._pop = buffer.pop
+
+    def seed(self, seed=None):
+        """Reseed this die and discard its buffered outcomes."""
+        self._random.seed(seed)
+        self._set_buffer([])
+
+    def getstate(self):
+        """Return an object that setstate can use to restore this die."""
+        return self._random.getstate(), tuple(self._buffer)
+
+    def setstate(self, state):
+        """Restore a state returned by getstate."""
+        random_state, buffer = state
+        self._random.setstate(random_state)
+        self._set_buffer(list(buffer))
+
+def make_fair_dice(sides, seed=None):
     """Return a die that returns 1 to SIDES with equal chance."""
-    assert type(sides) == int and sides >= 1, 'Illegal value for sides'
-    def dice():
-        return randint(1,sides)
-    return dice
+    return FairDice(sides, seed)
 
 four_sided_dice = make_fair_dice(4)
 six_sided_dice = make_fair_dice(6)
 
+class ReplayDice:
+    """A die with SIDES sides that returns the recorded OUTCOMES in order.
+
+    Once the outcomes run out, the die rolls FALLBACK instead, or raises
+    IndexError if there is no FALLBACK.
+
+    >>> dice = ReplayDice(6, [3, 5], make_test_dice(2))
+    >>> [dice() for _ in range(4)], dice.position
+    ([3, 5, 2, 2], 4)
+    """
+
+    def __init__(self, sides, outcomes, fallback=None):
+        self.sides = sides
+        self.outcomes = outcomes
+        self.fallback = fallback
+        self.position = 0
+
+    def __call__(self):
+        position = self.position
+        self.position = position + 1
+        if position < len(self.outcomes):
+            return self.outcomes[position]
+        if self.fallback is None:
+            raise IndexError('recorded dice outcomes are exhausted')
+        return self.fallback()
+
 def make_test_dice(*outcomes):
     """Return a die that cycles deterministically through OUTCOMES.
 
@@ -0,0 +1,70 @@
+"""Exact win probabilities for a pair of strategies.
+
+Every turn adds at least one point to the current player's score, so the sum
+of the two scores grows on every turn and no state of the game can repeat.
+The chance of winning from every pair of scores below the goal can therefore
+be computed by dynamic programming, working backwards from the states closest
+to the end of the game, using the turn transition kernel from kernel.py.
+"""
+
+from compiled import strategy_table
+from kernel import transition_kernel
+from rules import HogRules
+
+def win_probability(strategy0, strategy1, goal=100, rules=None):
+    """Return the exact chance that the first player wins a game in which
+    player 0 uses STRATEGY0 and player 1 uses STRATEGY1.
+
+    Both strategies must be deterministic functions of the two scores.  The
+    game is played to GOAL under the standard rules, or under the HogRules
+    RULES, if given.
+
+    >>> round(win_probability(lambda s, o: 5, lambda s, o: 5), 6)
+    0.505567
+    >>> win_probability(lambda s, o: 0, lambda s, o: 0)
+    1.0
+    >>> round(win_probability(lambda s, o: 5, lambda s, o: 5,
+    ...                       rules=HogRules(pig_out=False)), 6)
+    0.588361
+    """
+    if rules is None:
+        rules = HogRules(goal)
+    goal = rules.goal
+    choices = transition_kernel(rules).choices
+    table0 = strategy_table(strategy0, goal, rules.max_dice)
+    table1 = strategy_table(strategy1, goal, rules.max_dice)
+
+    # first[a * goal + b] is the chance that player 0 wins when player 0 is
+    # about to move with a points against b; second is the same chance when
+    # player 1 is about to move.
+    first = [0.0] * (goal * goal)
+    second = [0.0] * (goal * goal)
+    for a in range(goal - 1, -1, -1):
+        for b in range(goal - 1, -1, -1):
+            options = choices[a * goal + b]
+            chance = 0.0
+            for points, p in options[min(table0[a * goal + b], len(options) - 1)]:
+                if a + points >= goal:
+                    chance += p
+                else:
+                    chance += p * second[(a + points) * goal + b]
+            first[a * goal + b] = chance
+
+            options = choices[b * goal + a]
+            chance = 0.0
+            for points, p in options[min(table1[b * goal + a], len(options) - 1)]:
+                if b + points < goal:
+                    chance += p * first[a * goal + b + points]
+            second[a * goal + b] = chance
+    return first[0]
+
+def win_rate(strategy, baseline, goal=100, rules=None):
+    """Return the exact win rate of STRATEGY against BASELINE, averaged over
+    both seatings like compare_strategies.
+
+    >>> win_rate(lambda s, o: 4, lambda s, o: 4)
+    0.5
+    """
+    as_first = win_probability(strategy, baseline, goal, rules)
+    as_second = 1 - win_probability(baseline, strategy, goal, rules)
+    return (as_first + as_second) / 2
@@ -0,0 +1,254 @@
+"""A compact binary log of every turn of many games of Hog.
+
+Each turn is one fixed-width record of RECORD.size (24) bytes:
+
+    game            uint32  Number of the game in the log, from 0.
+    player          uint8   0 or 1.
+    requested       uint8   Number of dice the strategy asked for.
+    granted         uint8   Number of dice rolled, after Hog Tied.
+    sides           uint8   Sides of the dice rolled (4 under Hog Wild).
+    outcomes        10 x uint8, the dice rolled, padded with zeros.
+    points          uint8   Turn score, after every rule.
+    rules           uint8   Bit flags of the rules that fired (see below).
+    score           uint16  The player's score before the turn.
+    opponent_score  uint16  The opponent's score.
+
+A GameRecorder appends records to a file through a large buffer, so
+recording a game costs little more than packing its records.  A GameLog
+reads a log through mmap without loading it: records are unpacked only when
+they are used, and with NumPy installed, as_array views the whole log as a
+structured array of DTYPE without copying it.
+"""
+
+from collections import namedtuple
+import mmap
+import os
+import struct
+
+from rules import STANDARD
+
+RECORD = struct.Struct('<IBBBB10sBBHH')
+Turn = namedtuple('Turn', ['game', 'player', 'requested', 'granted', 'sides',
+                           'outcomes', 'points', 'rules', 'score',
+                           'opponent_score'])
+DTYPE = [('game', '<u4'), ('player', 'u1'), ('requested', 'u1'),
+         ('granted', 'u1'), ('sides', 'u1'), ('outcomes', 'u1', (10,)),
+         ('points', 'u1'), ('rules', 'u1'), ('score', '<u2'),
+         ('opponent_score', '<u2')]
+
+HOG_TIED = 1        # The player asked for more dice than Hog Tied allowed.
+HOG_WILD = 2        # The player rolled the dice of Hog Wild (four-sided).
+FREE_BACON = 4      # The player rolled zero dice.
+TOUCHDOWN = 8       # The turn score was a multiple of 6 and grew by a sixth.
+FORTY_NINERS = 16   # A 1 was rolled from 49 points and did not pig out.
+PIG_OUT = 32        # A 1 was rolled and the turn scored 1.
+RULES = {'hog_tied': HOG_TIED, 'hog_wild': HOG_WILD, 'free_bacon': FREE_BACON,
+         'touchdown': TOUCHDOWN, 'forty_niners': FORTY_NINERS,
+         'pig_out': PIG_OUT}
+
+BUFFER_SIZE = 1 << 20   # Bytes of records a recorder collects per write.
+
+def score_turn(requested, granted, rolls, score, opponent_score,
+               rules=STANDARD):
+    """Return the turn score and rule flags of a turn in which the player with
+    SCORE asked for REQUESTED dice, rolled GRANTED dice with outcomes ROLLS,
+    against OPPONENT_SCORE, under the HogRules RULES.
+
+    >>> score_turn(5, 1, [6], 10, 7) == (7, HOG_TIED | TOUCHDOWN)
+    True
+    >>> score_turn(2, 2, [1, 5], 49, 1) == (6 + 1, FORTY_NINERS | TOUCHDOWN)
+    True
+    >>> from rules import HogRules
+    >>> score_turn(2, 2, [1, 5], 10, 1, HogRules(pig_out=False, touchdown=None))
+    (6, 0)
+    """
+    if granted == 0:
+        points = rules.free_bacon(opponent_score)
+    elif 1 in rolls and rules.ones_lose(score):
+        points = 1
+    else:
+        points = rules.bonus(sum(rolls))
+    return points, turn_flags(requested, granted, rolls, score, opponent_score,
+                              points, rules, rules.tables())
+
+def turn_flags(requested, granted, rolls, score, opponent_score, points, rules,
+               tables):
+    """Return the rule flags of a turn like those of score_turn, which scored
+    POINTS, reading the RuleTables TABLES of the HogRules RULES.  Engines that
+    have already scored a turn call this instead of score_turn.
+
+    >>> from rules import STANDARD
+    >>> turn_flags(5, 1, [6], 10, 7, 7, STANDARD, STANDARD.tables()) == (
+    ...     HOG_TIED | TOUCHDOWN)
+    True
+    """
+    total = score + opponent_score
+    flags = 0
+    if requested > granted and tables.allowed_dice[total] < rules.max_dice:
+        flags |= HOG_TIED
+    if granted == 0:
+        flags |= FREE_BACON
+        if points != rules.bacon(opponent_score):
+            flags |= TOUCHDOWN
+        return flags
+    if tables.dice_sides[total] != rules.sides:
+        flags |= HOG_WILD
+    if 1 in rolls:
+        if tables.ones_lose[score]:
+            return flags | PIG_OUT
+        if rules.pig_out:
+            flags |= FORTY_NINERS
+    if points != sum(rolls):
+        flags |= TOUCHDOWN
+    return flags
+
+class GameRecorder:
+    """Appends the turns of games to the log at PATH.
+
+    Use a recorder as a context manager, or close it, so that its buffered
+    records are written.  Games are numbered after those already in the log.
+    """
+
+    def __init__(self, path, buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.game = 0
+        if os.path.exists(path) and os.path.getsize(path) >= RECORD.size:
+            with open(path, 'rb') as log:
+                log.seek(-RECORD.size, os.SEEK_END)
+                self.game = RECORD.unpack(log.read(RECORD.size))[0] + 1
+        self.file = open(path, 'ab')
+        self.buffer = bytearray()
+        self.rolls = []
+        self.sides = 0
+
+    def watch(self, dice):
+        """Return a die that rolls DICE and remembers its outcomes for the next
+        call to record_turn."""
+        rolls = self.rolls
+        self.sides = getattr(dice, 'sides', 0)
+        def watched():
+            outcome = dice()
+            rolls.append(outcome)
+            return outcome
+        return watched
+
+    def record_turn(self, player, requested, granted, score, opponent_score,
+                    rolls=None, sides=0, game=0, points=None, flags=0,
+                    rules=STANDARD):
+        """Record a turn in which PLAYER, with SCORE points against
+        OPPONENT_SCORE, asked for REQUESTED dice and rolled GRANTED dice with
+        SIDES sides, with outcomes ROLLS.  Without ROLLS, the outcomes of the
+        die returned by watch are used.  The turn belongs to the current game,
+        or to the GAMEth game after it when many games are recorded at once.
+
+        Engines pass the POINTS and rule FLAGS of the turn, which they have
+        already worked out.  Without POINTS, the turn is scored by score_turn
+        under the HogRules RULES."""
+        watched = rolls is None
+        if watched:
+            rolls, sides = self.rolls, self.sides
+        if points is None:
+            points, flags = score_turn(requested, granted, rolls, score,
+                                       opponent_score, rules)
+        if not granted:
+            sides = 0
+        elif not sides:
+            sides = rules.dice_sides(score + opponent_score)
+        if requested > 255:
+            requested = 255
+        buffer = self.buffer
+        buffer += RECORD.pack(self.game + game, player, requested, granted,
+                              sides, bytes(rolls), points, flags, score,
+                              opponent_score)
+        if watched:
+            rolls.clear()
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def end_game(self, games=1):
+        """Start recording the next game, or skip GAMES games at once."""
+        self.game += games
+
+    def flush(self):
+        """Write the buffered records to the log."""
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class GameLog:
+    """The turns recorded in the log at PATH, read through mmap.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'games.log')
+    >>> with GameRecorder(path) as recorder:
+    ...     recorder.record_turn(0, 3, 3, 0, 0, [4, 1, 6], 4)
+    ...     recorder.record_turn(1, 0, 0, 0, 1)
+    ...     recorder.end_game()
+    >>> with GameLog(path) as log:
+    ...     len(log), log[0].points, log[0].outcomes, log.rule_counts()['pig_out']
+    (2, 1, (4, 1, 6), 1)
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = os.path.getsize(path)
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.count = size // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not -self.count <= index < self.count:
+            raise IndexError('turn index out of range')
+        return _turn(RECORD.unpack_from(self.map, (index % self.count) * RECORD.size))
+
+    def __iter__(self):
+        for fields in RECORD.iter_unpack(self.map[:self.count * RECORD.size]):
+            yield _turn(fields)
+
+    def rule_counts(self):
+        """Return how many turns each rule fired in, by rule name."""
+        counts = dict.fromkeys(RULES, 0)
+        flags = self.map[RECORD.size - 5:self.count * RECORD.size:RECORD.size]
+        for rules in set(flags):
+            times = flags.count(rules)
+            for name, flag in RULES.items():
+                if rules & flag:
+                    counts[name] += times
+        return counts
+
+    def as_array(self):
+        """Return the log as a NumPy structured array of DTYPE that shares
+        its memory with the mapped file.  Requires NumPy."""
+        import numpy
+        return numpy.frombuffer(self.map, dtype=numpy.dtype(DTYPE),
+                                count=self.count)
+
+    def close(self):
+        if self.count:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _turn(fields):
+    """Return the Turn for unpacked record FIELDS, keeping only the outcomes
+    of the dice that were rolled."""
+    turn = Turn._make(fields)
+    return turn._replace(outcomes=tuple(turn.outcomes[:turn.granted]))
@@ -1,71 +1,93 @@
 """The Game of Hog"""
 
-from dice import four_sided_dice, six_sided_dice, make_test_dice
+from dice import four_sided_dice, six_sided_dice, make_fair_dice, make_test_dice
 from ucb import main, trace, log_current_line, interact
+from outcomes import expected_turn_score, chance_of_exact, chance_of_at_least, max_turn_score
+from rules import (MAX_NUM_ROLLS, STANDARD, HogRules, allowed_dice, dice_sides,
+                   free_bacon, rule_tables)
+from contextlib import contextmanager
+from types import MappingProxyType
+import metrics
+import time
 
 goal = 100          # The goal of Hog is to score 100 points.
-commentary = True  # Whether to display commentary for every roll.
-MAX_NUM_ROLLS = 10
+_standard_tables = STANDARD.tables()   # The rule tables of play by default.
+commentator = None  # Listener for commentary on every roll, or None.
+workers = 1         # Number of processes that play games in experiments.
+metrics_path = None # JSON file for the metrics of run_experiments, or None.
 
-def roll_dice(num_rolls, dice=six_sided_dice, who='Boss Hogg', ones_lose=True):
+def roll_dice(num_rolls, dice=six_sided_dice, who='Boss Hogg', ones_lose=True,
+              max_dice=MAX_NUM_ROLLS):
     """Calculate WHO's turn score after rolling DICE for NUM_ROLLS times.
 
     num_rolls:  The number of dice rolls that will be made; at least 1.
     dice:       A function of no args and returns an integer outcome.
     who:        Name of the current player, for commentary.
+    max_dice:   The most dice a player may roll.
     """
     assert type(num_rolls) == int, 'num_rolls must be an integer.'
     assert num_rolls > 0, 'Must roll at least once.'
-    assert num_rolls <= 10, 'Number of dice must not exceed 10.'
-
-    score = 0
-    pigOut = False
-
-    for i in range(num_rolls):
-
-        roll = dice()
-        if commentary:
-            announce(roll, who)
-        if roll == 1 and ones_lose:
-            pigOut = True
-        else:
-            score += roll
-
-    if pigOut:
-        if commentary:
-            print(who + " rolled a 1 and pigs out!")
-        score = 1
+    assert num_rolls <= max_dice, 'Number of dice must not exceed {0}.'.format(max_dice)
+
+    rolls = [dice() for i in range(num_rolls)]
+    pigOut = ones_lose and 1 in rolls
+    score = 1 if pigOut else sum(rolls)
+
+    if metrics.collector is not None:
+        counts = metrics.collector.counts
+        counts['dice'] += num_rolls
+        if pigOut:
+            counts['pig_out'] += 1
+        elif 1 in rolls:
+            counts['forty_niners'] += 1
+
+    if commentator is not None:
+        for roll in rolls:
+            commentator.rolled(who, roll)
+        if pigOut:
+            commentator.pigged_out(who)
 
     return score
 
-def take_turn(num_rolls, opp_score, dice = six_sided_dice, who = 'Boss Hogg', ones_lose=True):
+def take_turn(num_rolls, opp_score, dice = six_sided_dice, who = 'Boss Hogg', ones_lose=True,
+              rules=STANDARD):
     """Simulate a turn in which WHO chooses to roll NUM_ROLLS, perhaps 0.
 
     num_rolls:       The number of dice rolls that will be made.
     opponent_score:  The total score of the opponent.
     dice:            A function of no args and returns an integer outcome.
     who:             Name of the current player, for commentary.
+    rules:           The HogRules that score the turn.
     """
 
     assert type(num_rolls) == int, 'num_rolls must be an integer.'
     assert num_rolls >= 0, 'Cannot roll a negative number of dice.'
 
-    if commentary:
-        print(who, 'is going to roll', num_rolls, 'dice')
+    if commentator is not None:
+        commentator.turn_started(who, num_rolls)
 
+    tables = _standard_tables if rules is STANDARD else rules.tables()
     score = 0
     if num_rolls == 0:
-        score = 1 + opp_score//10
+        score = rules.bacon(opp_score)
+        if metrics.collector is not None:
+            metrics.collector.counts['free_bacon'] += 1
     else:
-        score = roll_dice(num_rolls, dice, who, ones_lose)
+        score = roll_dice(num_rolls, dice, who, ones_lose, rules.max_dice)
 
-    if score % 6 == 0:
-        if commentary:
-            print("Touchdown! {0}'s score is a multiple of 6. +{1} extra points!".format(who, score//6))
-        score += score//6
+    bonus = tables.touchdown[score] - score
+    if bonus:
+        if commentator is not None:
+            commentator.touchdown(who, bonus)
+        if metrics.collector is not None:
+            metrics.collector.counts['touchdown'] += 1
+        score += bonus
 
-    if commentary:
-        print(who + " scored " + str(score) + " points this turn.")
+    if metrics.collector is not None:
+        metrics.collector.counts['turns'] += 1
+
+    if commentator is not None:
+        commentator.turn_ended(who, score)
     return score
 
 def take_turn_test():
@@ -111,6 +133,146 @@ def take_turn_test():
 
 # Commentator
 
+class Commentator:
+    """A listener for the events of a game, set as the module's commentator.
+
+    Every event is ignored here; subclasses override the ones they report.
+    Without a commentator, roll_dice and take_turn report nothing at all.
+
+    This class uses Python syntax/techniques not yet covered in this course.
+    """
+
+    def turn_started(self, who, num_rolls):
+        """WHO is about to roll NUM_ROLLS dice."""
+
+    def rolled(self, who, outcome):
+        """One of WHO's dice came up OUTCOME."""
+
+    def pigged_out(self, who):
+        """WHO rolled a 1 and scores 1 point for the turn."""
+
+    def touchdown(self, who, bonus):
+        """WHO's turn score was a multiple of 6 and earns BONUS extra points."""
+
+    def turn_ended(self, who, score):
+        """WHO scored SCORE points this turn."""
+
+class ConsoleCommentator(Commentator):
+    """Prints every event, drawing each die, as interactive games do."""
+
+    def turn_started(self, who, num_rolls):
+        print(who, 'is going to roll', num_rolls, 'dice')
+
+    def rolled(self, who, outcome):
+        announce(outcome, who)
+
+    def pigged_out(self, who):
+        print(who + " rolled a 1 and pigs out!")
+
+    def touchdown(self, who, bonus):
+        print("Touchdown! {0}'s score is a multiple of 6. +{1} extra points!".format(who, bonus))
+
+    def turn_ended(self, who, score):
+        print(who + " scored " + str(score) + " points this turn.")
+
+class LogCommentator(ConsoleCommentator):
+    """Collects the lines ConsoleCommentator would print and writes them to
+    FILE once per turn.  Dice are not drawn, unless DRAW is true, in which
+    case the dice of a turn are drawn side by side with draw_numbers after
+    the lines that name them.
+
+    >>> import hog, io
+    >>> log = io.StringIO()
+    >>> hog.commentator = LogCommentator(log)
+    >>> hog.take_turn(2, 0, make_test_dice(4, 2))
+    7
+    >>> hog.commentator = LogCommentator(log, draw=True)
+    >>> hog.take_turn(2, 0, make_test_dice(4, 3))
+    7
+    >>> hog.commentator = None
+    >>> print(log.getvalue(), end='')
+    Boss Hogg is going to roll 2 dice
+    Boss Hogg rolled a 4
+    Boss Hogg rolled a 2
+    Touchdown! Boss Hogg's score is a multiple of 6. +1 extra points!
+    Boss Hogg scored 7 points this turn.
+    Boss Hogg is going to roll 2 dice
+    Boss Hogg rolled a 4
+    Boss Hogg rolled a 3
+     -------   -------
+    | *   * | | *     |
+    |       | |   *   |
+    | *   * | |     * |
+     -------   -------
+    Boss Hogg scored 7 points this turn.
+    """
+
+    def __init__(self, file, draw=False):
+        self.file = file
+        self.draw = draw
+        self.lines = []
+        self.rolls = []
+
+    def turn_started(self, who, num_rolls):
+        self.lines.append('{0} is going to roll {1} dice'.format(who, num_rolls))
+
+    def rolled(self, who, outcome):
+        self.lines.append('{0} rolled a {1}'.format(who, outcome))
+        if self.draw:
+            self.rolls.append(outcome)
+
+    def pigged_out(self, who):
+        self.draw_rolls()
+        self.lines.append(who + " rolled a 1 and pigs out!")
+
+    def touchdown(self, who, bonus):
+        self.draw_rolls()
+        self.lines.append("Touchdown! {0}'s score is a multiple of 6. +{1} extra points!".format(who, bonus))
+
+    def turn_ended(self, who, score):
+        self.draw_rolls()
+        self.lines.append(who + " scored " + str(score) + " points this turn.")
+        self.lines.append('')
+        self.file.write('\n'.join(self.lines))
+        self.lines = []
+
+    def draw_rolls(self):
+        """Draw the dice rolled since they were last drawn, if any."""
+        if self.rolls:
+            self.lines.append(draw_numbers(self.rolls))
+            self.rolls = []
+
+class CountingCommentator(Commentator):
+    """Counts how many times each event happens, by event name.
+
+    >>> import hog
+    >>> hog.commentator = counter = CountingCommentator()
+    >>> hog.take_turn(3, 0, make_test_dice(4, 1, 6))
+    1
+    >>> hog.commentator = None
+    >>> counter.counts['rolled'], counter.counts['pigged_out']
+    (3, 1)
+    """
+
+    def __init__(self):
+        from collections import Counter
+        self.counts = Counter()
+
+    def turn_started(self, who, num_rolls):
+        self.counts['turn_started'] += 1
+
+    def rolled(self, who, outcome):
+        self.counts['rolled'] += 1
+
+    def pigged_out(self, who):
+        self.counts['pigged_out'] += 1
+
+    def touchdown(self, who, bonus):
+        self.counts['touchdown'] += 1
+
+    def turn_ended(self, who, score):
+        self.counts['turn_ended'] += 1
+
 def announce(outcome, who):
     """Print a description of WHO rolling OUTCOME."""
     print(who, 'rolled a', outcome)
@@ -135,41 +297,46 @@ def draw_number(n, dot='*'):
     | $   $ |
      -------
     """
-    """
-    1 = c
-    2 = b or f
-    3 = (b or f) and c
-    4 = b and f
-    5 = b and f and c
-    6 = b and s and f
-    """
-    #draw_dice function can only draw a max of 7 dots.
-    #Can you use "and" operator?
     assert type(n)==int
     assert n <= 7
     assert n > 0
-
-    c = f = b = s = False
-
-    #switch statement?
-    #how to randomly choose orientation of 2 and 3?
-    
-    if n == 1:
-        c = True
-    elif n == 2:
-        b = True
-    elif n == 3:
-        b,c = True, True
-    elif n == 4:
-        b,f = True, True
-    elif n == 5:
-        b,c,f = True, True, True
-    elif n == 6:
-        b,f,s = True, True, True
-    elif n == 7:
-        b,c,f,s = True, True, True, True
-    
-    return draw_dice(c,f,b,s,dot)
+    if dot in _faces:
+        return _faces[dot][n]
+    return draw_dice(*_dots[n], dot=dot)
+
+# Which of the c, f, b and s positions of draw_dice hold a dot for each
+# number from 1 to 7, at the index of the number.
+#   1 = c
+#   2 = b or f
+#   3 = (b or f) and c
+#   4 = b and f
+#   5 = b and f and c
+#   6 = b and s and f
+#   7 = b and c and f and s
+_dots = ((False, False, False, False),
+         (True, False, False, False),
+         (False, False, True, False),
+         (True, False, True, False),
+         (False, True, True, False),
+         (True, True, True, False),
+         (False, True, True, True),
+         (True, True, True, True))
+
+def draw_numbers(outcomes, dot='*'):
+    """Return a text representation of rolling all of OUTCOMES, drawn side by
+    side on the same five lines.
+
+    >>> print(draw_numbers([1, 4]))
+     -------   -------
+    |       | | *   * |
+    |   *   | |       |
+    |       | | *   * |
+     -------   -------
+    """
+    drawings = [draw_number(n, dot).split('\n') for n in outcomes]
+    rows = zip(*drawings)
+    return '\n'.join(' '.join(line.ljust(9) for line in row).rstrip()
+                     for row in rows)
 
 def draw_dice(c, f, b, s, dot):
     """Return an ASCII art representation of a die roll.
@@ -202,13 +369,18 @@ def draw_dice(c, f, b, s, dot):
     bottom = ' '.join(['|', f, ' ', b, '|'])
     return '\n'.join([border, top, middle, bottom, border])
 
+# Every number drawn with each of the usual dots, as a tuple indexed by number.
+_faces = MappingProxyType({dot: tuple(draw_dice(c, f, b, s, dot)
+                                      for c, f, b, s in _dots)
+                           for dot in '*$'})
+
 
 # Game simulator
 
-def num_allowed_dice(score, opponent_score):
+def num_allowed_dice(score, opponent_score, rules=STANDARD):
     """Return the maximum number of dice allowed this turn. The maximum
     number of dice allowed is 10 unless the sum of SCORE and
-    OPPONENT_SCORE has a 7 as its ones digit.
+    OPPONENT_SCORE has a 7 as its ones digit, or as set by RULES.
 
     >>> num_allowed_dice(1, 0)
     10
@@ -218,25 +390,43 @@ def num_allowed_dice(score, opponent_score):
     1
     >>> num_allowed_dice(3, 24)
     1
+    >>> num_allowed_dice(1, 0, HogRules(max_dice=6))
+    6
     """
 
-    if (score + opponent_score)%10 == 7:
-        return 1
+    return rules.tables().allowed_dice[score + opponent_score]
 
-    return 10
+# Fair dice by number of sides, for the dice of variants of the rules.
+_fair_dice = {4: four_sided_dice, 6: six_sided_dice}
 
-def select_dice(score, opponent_score):
-    """Select 6-sided dice unless the sum of scores is a multiple of 7.
+def select_dice(score, opponent_score, rules=STANDARD):
+    """Select 6-sided dice unless the sum of scores is a multiple of 7, or
+    the dice of RULES.
 
     >>> select_dice(4, 24) == four_sided_dice
     True
     >>> select_dice(16, 64) == six_sided_dice
     True
+    >>> select_dice(4, 24, HogRules(wild_sides=8)).sides
+    8
     """
-    if (score + opponent_score) % 7 == 0:
-        return four_sided_dice
-
-    return six_sided_dice
+    tables = _standard_tables if rules is STANDARD else rules.tables()
+    return fair_dice(tables.dice_sides[score + opponent_score])
+
+def fair_dice(sides):
+    """Return the fair die with SIDES sides that games roll."""
+    if sides not in _fair_dice:
+        _fair_dice[sides] = make_fair_dice(sides)
+    return _fair_dice[sides]
+
+def count_dice_rules(collector, requested, num_rolls, score_sum, rules=STANDARD):
+    """Count in the metrics COLLECTOR whether Hog Tied cut the REQUESTED dice
+    down to NUM_ROLLS, and whether Hog Wild switched the dice rolled, when the
+    scores add up to SCORE_SUM under RULES."""
+    if num_rolls < requested and rules.allowed_dice(score_sum) < rules.max_dice:
+        collector.counts['hog_tied'] += 1
+    if num_rolls and rules.dice_sides(score_sum) != rules.sides:
+        collector.counts['hog_wild'] += 1
 
 def other(who):
     """Return the other player, for players numbered 0 or 1.
@@ -257,7 +447,7 @@ def name(who):
     else:
         return 'An unknown player'
 
-def play(strategy0, strategy1):
+def play(strategy0, strategy1, recorder=None, dice=None, rules=None):
 
     """Simulate a game and return 0 if the first player wins and 1 otherwise.
 
@@ -269,35 +459,108 @@ def play(strategy0, strategy1):
 
     strategy0:  The strategy function for player 0, who plays first.
     strategy1:  The strategy function for player 1, who plays second.
+    recorder:   An optional gamelog.GameRecorder that records every turn.
+    dice:       An optional pair of functions, one for each player, that
+                select dice instead of select_dice (see replay.replay_dice).
+    rules:      The HogRules of the game, instead of the standard rules for
+                the module's goal.  Recorded turns are scored by RULES.
+
+    With metrics on, the time spent in strategies and in turns is counted.
     """
 
     who = 1 # Which player is about to take a turn, 0 (first) or 1 (second)
     p0 = 0
     p1 = 0
     turn_number = 0
-
-    while p0 < goal and p1 < goal:
+    if rules is None:
+        rules = STANDARD if goal == STANDARD.goal else HogRules(goal)
+    elif rules == STANDARD:
+        rules = STANDARD
+    if rules is STANDARD:
+        tables = _standard_tables
+    else:
+        tables = rules.tables()
+        fair_dice(rules.sides), fair_dice(rules.wild_sides)
+    game_goal = rules.goal
+    allowed_dice, dice_sides, ones_lose = (tables.allowed_dice, tables.dice_sides,
+                                           tables.ones_lose)
+    if recorder is not None:
+        from gamelog import turn_flags
+    collector = metrics.collector
+    if collector is not None:
+        strategy0, strategy1 = timed(strategy0), timed(strategy1)
+        start = time.perf_counter()
+
+    while p0 < game_goal and p1 < game_goal:
         who = other(who)
-        max_dice = num_allowed_dice(p0,p1)
+        max_dice = allowed_dice[p0 + p1]
 
         if who == 0:
-            num_rolls = strategy0(p0,p1)
+            requested = num_rolls = strategy0(p0,p1)
 
             if num_rolls > max_dice:
                 num_rolls = max_dice
-
-            p0 += take_turn(num_rolls, p1, select_dice(p0, p1), name(who), (p0 != 49))
+            if collector is not None:
+                count_dice_rules(collector, requested, num_rolls, p0 + p1, rules)
+
+            if dice is None:
+                turn_dice = _fair_dice[dice_sides[p0 + p1]]
+            else:
+                turn_dice = dice[0](p0, p1)
+            if recorder is not None:
+                turn_dice = recorder.watch(turn_dice)
+            points = take_turn(num_rolls, p1, turn_dice, name(who),
+                               ones_lose[p0], rules)
+            if recorder is not None:
+                flags = turn_flags(requested, num_rolls, recorder.rolls, p0, p1,
+                                   points, rules, tables)
+                recorder.record_turn(who, requested, num_rolls, p0, p1,
+                                     points=points, flags=flags, rules=rules)
+            p0 += points
 
         else:            
-            num_rolls = strategy1(p1, p0)
+            requested = num_rolls = strategy1(p1, p0)
 
             if num_rolls > max_dice:
                 num_rolls = max_dice
-
-            p1 += take_turn(num_rolls, p0, select_dice(p1, p0), name(who), (p1 != 49))
-
+            if collector is not None:
+                count_dice_rules(collector, requested, num_rolls, p0 + p1, rules)
+
+            if dice is None:
+                turn_dice = _fair_dice[dice_sides[p0 + p1]]
+            else:
+                turn_dice = dice[1](p1, p0)
+            if recorder is not None:
+                turn_dice = recorder.watch(turn_dice)
+            points = take_turn(num_rolls, p0, turn_dice, name(who),
+                               ones_lose[p1], rules)
+            if recorder is not None:
+                flags = turn_flags(requested, num_rolls, recorder.rolls, p1, p0,
+                                   points, rules, tables)
+                recorder.record_turn(who, requested, num_rolls, p1, p0,
+                                     points=points, flags=flags, rules=rules)
+            p1 += points
+
+    if recorder is not None:
+        recorder.end_game()
+    if collector is not None:
+        collector.counts['games'] += 1
+        strategy_seconds = strategy0.seconds + strategy1.seconds
+        collector.seconds['strategy'] += strategy_seconds
+        collector.seconds['dice'] += time.perf_counter() - start - strategy_seconds
     return who
 
+def timed(strategy):
+    """Return STRATEGY, timed: the returned strategy adds the seconds spent
+    in STRATEGY to its seconds attribute."""
+    def timed_strategy(score, opponent_score):
+        start = time.perf_counter()
+        num_rolls = strategy(score, opponent_score)
+        timed_strategy.seconds += time.perf_counter() - start
+        return num_rolls
+    timed_strategy.seconds = 0
+    return timed_strategy
+
 # Basic Strategy
 
 def always_roll(n):
@@ -351,48 +614,277 @@ def make_average(fn, num_samples=100):
 
     return averageFN
 
-def compare_strategies(strategy, baseline=always_roll(5)):
-    """Return the average win rate (out of 1) of STRATEGY against BASELINE."""
-    as_first = 1 - make_average(play)(strategy, baseline)
-    as_second = make_average(play)(baseline, strategy)
-    return (as_first + as_second) / 2  # Average the two results
+def make_adaptive_average(fn, width=0.05, confidence=0.95, max_samples=10000,
+                          sprt_delta=None):
+    """Return a function that returns the average value of FN when called, as
+    an Estimate with a confidence interval and the number of samples used.
+
+    FN is called until the interval is no wider than WIDTH, until a sequential
+    probability ratio test decides whether the average is above or below 0.5
+    by SPRT_DELTA (for FN that returns 0 or 1), or MAX_SAMPLES times.
+
+    >>> avg_dice = make_adaptive_average(make_test_dice(3, 1, 5, 6),
+    ...                                  width=0.01, max_samples=40)
+    >>> estimate = avg_dice()
+    >>> estimate.samples, float(estimate)
+    (40, 3.75)
+    >>> make_adaptive_average(make_test_dice(1), width=0.1)().samples
+    30
+    """
+    from stats import RunningStats, should_stop
+    def averageFN(*args):
+        stats = RunningStats()
+        while stats.count < max_samples:
+            stats.add(fn(*args))
+            if should_stop(stats, width, confidence, sprt_delta):
+                break
+        return stats.estimate(confidence)
+
+    return averageFN
 
-def eval_strategy_range(make_strategy, lower_bound, upper_bound):
+BATCH_MIN_SAMPLES = 200  # Fewest games per seating worth compiling for.
+
+def compare_strategies(strategy, baseline=always_roll(5), num_samples=100,
+                       batch=None, seed=None, executor=None, width=None,
+                       sprt_delta=None, max_samples=100000, common=False,
+                       antithetic=False, exact=False, cache=None, profile=False):
+    """Return the average win rate (out of 1) of STRATEGY against BASELINE as
+    an Estimate, which also holds its confidence interval and number of games.
+
+    NUM_SAMPLES games are played in each seating.  With BATCH, both strategies
+    are compiled and the games are simulated together by play_many, so they
+    must be deterministic functions of the two scores; without BATCH, every
+    game is played one at a time by play.  By default, BATCH is used only if
+    both strategies can be tabulated (see parallel.tabulated), so random or
+    stateful strategies are still played by play, and only if compiling them
+    pays off: with at least BATCH_MIN_SAMPLES games per seating, a stopping
+    rule, EXACT or a CACHE.
+
+    With BATCH, the games are shared among the workers of EXECUTOR, if given,
+    and the same SEED always gives the same win rate.  COMMON and ANTITHETIC
+    pair up the dice of the two seatings as described in batch.play_many;
+    paired.compare_paired reports how much that reduces the variance.
+
+    With WIDTH or SPRT_DELTA, rounds of NUM_SAMPLES games per seating are
+    played until the confidence interval is no wider than WIDTH, until a
+    sequential probability ratio test decides whether STRATEGY wins more or
+    less than half of its games by SPRT_DELTA, or until MAX_SAMPLES games.
+
+    With EXACT, the win rate is computed exactly (see exact.py) instead, as an
+    Estimate whose interval is just that rate.
+
+    With a resultcache.ResultCache CACHE, exact win rates and the games played
+    with BATCH are kept in the cache, until the caller saves it.  Cached games
+    count towards NUM_SAMPLES (or the stopping rule), so only the games still
+    missing are played.
+
+    With PROFILE, both strategies are wrapped in StrategyProfiles (see
+    profiling.py), returned as the PROFILES attribute of the Estimate.  With
+    BATCH, they profile the calls that compile each strategy, and without it,
+    every decision of every game.
+
+    >>> compare_strategies(always_roll(5), exact=True)
+    0.5 (0.500 to 0.500, 0 samples)
+    >>> import random
+    >>> compare_strategies(lambda s, o: random.randrange(11)).samples
+    200
+    >>> rate = compare_strategies(always_roll(4), batch=False, profile=True)
+    >>> [sorted(profile.dice) for profile in rate.profiles]
+    [[4], [5]]
+    """
+    from parallel import fingerprint, portable, tabulated, win_counts
+    from profiling import StrategyProfile
+    from resultcache import result_key
+    from stats import Estimate, RunningStats, should_stop
+    profiles = None
+    if profile:
+        strategy, baseline = profiles = (StrategyProfile(strategy),
+                                         StrategyProfile(baseline))
+    adaptive = width is not None or sprt_delta is not None
+    if batch is None and not (num_samples >= BATCH_MIN_SAMPLES or adaptive
+                              or exact or cache is not None):
+        batch = False
+    if batch is None:
+        tables = tabulated(strategy, goal), tabulated(baseline, goal)
+        batch = None not in tables
+        if batch:
+            strategy, baseline = tables
+    elif batch:
+        strategy, baseline = portable(strategy, goal), portable(baseline, goal)
+    key = None
+    if cache is not None and (batch or exact):
+        method = 'exact' if exact else 'sampled/{0:d}/{1:d}'.format(common, antithetic)
+        key = result_key(fingerprint(strategy, goal), fingerprint(baseline, goal),
+                         HogRules(goal), method)
+    if exact:
+        rate = cache.exact(key) if key is not None else None
+        if rate is None:
+            from exact import win_rate
+            rate = win_rate(strategy, baseline, goal)
+            if key is not None:
+                cache.put_exact(key, rate)
+        estimate = Estimate(rate, rate, rate, 0)
+        estimate.profiles = profiles
+        return estimate
+
+    stats = RunningStats()
+    if key is not None:
+        stats.add_wins(*cache.samples(key))
+    target = max_samples if adaptive else 2 * num_samples
+    while not stats.count or stats.count < target:
+        if adaptive and should_stop(stats, width, sprt_delta=sprt_delta):
+            break
+        games = num_samples     # Per seating, or just those still missing.
+        if not adaptive and stats.count:
+            games = (target - stats.count + 1) // 2
+        if batch:
+            round_seed = seed
+            if seed is not None and stats.count:
+                round_seed = '{0}/{1}'.format(seed, stats.count)
+            wins = win_counts([strategy], baseline, games, goal,
+                              round_seed, executor, common=common,
+                              antithetic=antithetic)[0]
+        else:
+            wins = games - sum(play(strategy, baseline) for _ in range(games))
+            wins += sum(play(baseline, strategy) for _ in range(games))
+        stats.add_wins(wins, 2 * games)
+        if key is not None:
+            cache.add_samples(key, wins, 2 * games)
+    estimate = stats.estimate()
+    estimate.profiles = profiles
+    return estimate
+
+def eval_strategy_range(make_strategy, lower_bound, upper_bound, seed=None,
+                        executor=None, common=False, store=None, cache=None):
     """Return the best integer argument value for MAKE_STRATEGY to use against
     the always-roll-5 baseline, between LOWER_BOUND and UPPER_BOUND (inclusive).
 
     make_strategy -- A one-argument function that returns a strategy.
     lower_bound -- lower bound of the evaluation range.
     upper_bound -- upper bound of the evaluation range.
+    seed -- seed for the dice, for reproducible results.
+    executor -- a concurrent.futures executor that plays the games, if any.
+    common -- whether all values play the same dice (common random numbers).
+    store -- a checkpoint.ResultStore of games already played, if any.
+    cache -- a resultcache.ResultCache of win rates already sampled, if any.
+    """
+    return eval_strategy_grid(make_strategy, (lower_bound, upper_bound),
+                              seed=seed, executor=executor, common=common,
+                              store=store, cache=cache)[0]
+
+def eval_strategy_grid(make_strategy, *bounds, seed=None, executor=None,
+                       common=False, store=None, cache=None):
+    """Return the best tuple of integer arguments for MAKE_STRATEGY to use
+    against the always-roll-5 baseline, with each argument between the
+    (lower, upper) pair of BOUNDS in the same position (inclusive).
+
+    The values race by successive halving: every value plays 100 games per
+    seating, then the better half plays twice as many, and so on, so clearly
+    worse values stop early and the close ones are compared precisely.
+    Games found in STORE are not played again.  Without a STORE, games cached
+    in CACHE for a value count towards the games it plays, and either way the
+    games played are added to CACHE once the race has finished.
     """
-    best_value, best_win_rate = 0, 0
-    value = lower_bound
-    while value <= upper_bound:
-        strategy = make_strategy(value)
-        win_rate = compare_strategies(strategy)
+    from search import grid, successive_halving
+    best, estimates = successive_halving(make_strategy, grid(*bounds),
+                                         always_roll(5), goal, seed=seed,
+                                         executor=executor, common=common,
+                                         store=store, cache=cache)
+    for args, win_rate in estimates.items():
+        value = args[0] if len(args) == 1 else args
         print('Win rate against the baseline using', value, 'value:', win_rate)
-        if win_rate > best_win_rate:
-            best_win_rate, best_value = win_rate, value
-        value += 1
-    return best_value
-
-def run_experiments():
-    """Run a series of strategy experiments and report results."""
-    result = eval_strategy_range(always_roll, 1, 10)
-    print('Best always_roll strategy:', result)
-
-    if True: # Change to True when ready to test make_comeback_strategy
-        result = eval_strategy_range(make_comeback_strategy, 5, 15)
-        print('Best comeback strategy:', result)
-
-    if True: # Change to True when ready to test make_mean_strategy
-        result = eval_strategy_range(make_mean_strategy, 1, 10)
-        print('Best mean strategy:', result)
-
+    return best
+
+@contextmanager
+def make_executor():
+    """Return a context manager whose value is an executor with WORKERS
+    processes, or None for just one.  The workers are shut down when the
+    with statement ends, even if it ends with an exception or an interrupt,
+    and games not yet started are cancelled."""
+    if workers <= 1:
+        yield None
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(workers)
+    try:
+        yield executor
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def run_experiments(grids=False, store_path=None, cache_path=None):
+    """Run a series of strategy experiments and report results.
+
+    With GRIDS, also race the arguments of make_comeback_strategy and
+    make_mean_strategy together with their numbers of dice, which takes
+    several times as long as the other experiments.
+
+    The games are played by WORKERS processes.  With METRICS_PATH, metrics
+    are on during the experiments and their snapshot is written to that JSON
+    file.
+
+    Every finished shard of games is kept in the file at STORE_PATH, which
+    is EXPERIMENT_STORE by default, together with the seed of the experiments,
+    so an interrupted run resumes where it stopped and reaches the same
+    results.  Once each race has finished, the games it played are also added
+    to the resultcache.ResultCache at CACHE_PATH, which is RESULT_CACHE by
+    default, for later evaluations of the same strategies.  Delete the store
+    to experiment with new dice.
+    """
+    from checkpoint import ResultStore
+    from resultcache import ResultCache
+    if metrics_path is not None:
+        metrics.enable()
+    store = ResultStore(store_path or EXPERIMENT_STORE)
+    seed = store.seed()
+    def stage(name):
+        return '{0}/{1}'.format(seed, name)
+
+    cache = ResultCache(cache_path or RESULT_CACHE)
+    with make_executor() as executor, cache:
+        result = eval_strategy_range(always_roll, 1, 10,
+                                     seed=stage('always_roll'),
+                                     executor=executor, store=store, cache=cache)
+        print('Best always_roll strategy:', result)
+
+        if True: # Change to True when ready to test make_comeback_strategy
+            result = eval_strategy_range(make_comeback_strategy, 5, 15,
+                                         seed=stage('comeback'),
+                                         executor=executor, store=store,
+                                         cache=cache)
+            print('Best comeback strategy:', result)
+
+        if True: # Change to True when ready to test make_mean_strategy
+            result = eval_strategy_range(make_mean_strategy, 1, 10,
+                                         seed=stage('mean'),
+                                         executor=executor, store=store,
+                                         cache=cache)
+            print('Best mean strategy:', result)
+
+        if grids: # Margin and number of dice of make_comeback_strategy together
+            best = eval_strategy_grid(make_comeback_strategy, (5, 15), (3, 9),
+                                      seed=stage('comeback_grid'),
+                                      executor=executor, store=store,
+                                      cache=cache)
+            print('Best comeback margin and num_rolls:', best)
+
+        if grids: # Minimum points and number of dice of make_mean_strategy together
+            best = eval_strategy_grid(make_mean_strategy, (1, 10), (3, 9),
+                                      seed=stage('mean_grid'),
+                                      executor=executor, store=store,
+                                      cache=cache)
+            print('Best mean min_points and num_rolls:', best)
+
+    if metrics_path is not None:
+        metrics.disable().write(metrics_path)
+        print('Metrics written to', metrics_path)
     return result
 
     "*** You may add additional experiments here if you wish ***"
 
+def run_grid_experiments():
+    """Run the strategy experiments, including the grid races."""
+    return run_experiments(grids=True)
+
 
 # Strategies
 
@@ -411,12 +903,13 @@ def make_comeback_strategy(margin, num_rolls=5):
 
 def make_mean_strategy(min_points, num_rolls=5):
     """Return a strategy that attempts to give the opponent problems."""
-    
+    rules = rule_tables(goal)
+    free_bacon, dice_sides, allowed_dice = (rules.free_bacon, rules.dice_sides,
+                                            rules.allowed_dice)
+
     def strategy(score, opponent_score):
 
-        turn_score = 1 + opponent_score // 10
-        if turn_score % 6 == 0:
-            turn_score += turn_score // 6
+        turn_score = free_bacon[opponent_score]
 
         if turn_score >= min_points:
 
@@ -424,7 +917,7 @@ def make_mean_strategy(min_points, num_rolls=5):
 
             #multiples of 7 are more likely than a score ending in 7 (i think) so check multiple 7 first
             #score_sum will always be greater than 0
-            if (score_sum % 7) == 0 or (score_sum % 10) == 7:
+            if dice_sides[score_sum] == 4 or allowed_dice[score_sum] == 1:
                 return 0
         return num_rolls
 
@@ -450,6 +943,67 @@ def final_strategy(score, opponent_score):
 
     Else, roll whatever number dice the comeback strategy returns.
 
+    The rules are read from tables computed once per goal, so a call
+    allocates nothing.  The decisions are those of reference_final_strategy.
+
+    >>> all(final_strategy(score, opponent_score) ==
+    ...     reference_final_strategy(score, opponent_score)
+    ...     for score in range(goal) for opponent_score in range(goal))
+    True
+    """
+    free_bacon, hog_wild, tied_or_wild, bacon_threshold = (
+        _final_tables.get(goal) or _make_final_tables(goal))
+    current_sum = score + opponent_score
+
+    if score == 49:
+        return 49
+
+    bacon = free_bacon[opponent_score]
+    future_score = score + bacon
+    if future_score >= goal:
+        return 0
+    if goal - opponent_score >= 5:
+        if (future_score == 49 or tied_or_wild[future_score + opponent_score]
+                or bacon >= bacon_threshold[current_sum]):
+            return 0
+
+    if hog_wild[current_sum]:
+        return 4
+
+    difference = opponent_score - score
+    if (goal - opponent_score <= 10 and difference >= 42) or score == 48:
+        return 10
+
+    if difference >= 10:
+        return 6
+    return 5
+
+_final_tables = {}  # Tables read by final_strategy, by goal.
+
+def _make_final_tables(goal):
+    """Return and keep the tables that final_strategy reads for GOAL.
+
+    They are the Free Bacon score for each opponent score, and for each sum
+    of scores, whether Hog Wild applies (final_strategy ignores it when both
+    scores are 0), whether Hog Tied or Hog Wild applies,
+    and the least Free Bacon score that is worth more than rolling: 3 points
+    under both rules, 4 under Hog Tied (one six-sided die averages 3.7) and 5
+    under Hog Wild (the best four-sided roll averages 4.6).
+    """
+    rules = rule_tables(goal)
+    hog_tied = tuple(allowed == 1 for allowed in rules.allowed_dice)
+    hog_wild = tuple(total != 0 and sides == 4
+                     for total, sides in enumerate(rules.dice_sides))
+    tied_or_wild = tuple(tied or wild for tied, wild in zip(hog_tied, hog_wild))
+    bacon_threshold = tuple(3 if tied and wild else 4 if tied else 5 if wild else goal
+                            for tied, wild in zip(hog_tied, hog_wild))
+    tables = rules.free_bacon, hog_wild, tied_or_wild, bacon_threshold
+    _final_tables[goal] = tables
+    return tables
+
+def reference_final_strategy(score, opponent_score):
+    """The original form of final_strategy, which defines its helpers anew on
+    every call.  Kept to check and benchmark final_strategy against.
     """
     difference = opponent_score - score
     current_sum = score + opponent_score
@@ -458,11 +1012,11 @@ def final_strategy(score, opponent_score):
 
     def isHogTied(total_score = current_sum):
 
-        return (total_score % 10) == 7
+        return allowed_dice(total_score) == 1
 
     def isHogWild(total_score = current_sum):
 
-        return (total_score != 0) and (total_score % 7) == 0
+        return (total_score != 0) and dice_sides(total_score) == 4
 
     def is49ers(input_score = score):
 
@@ -470,12 +1024,7 @@ def final_strategy(score, opponent_score):
 
     def calculateFreeBacon(x):
 
-        freeBacon = (1 + (x // 10))
-        
-        if freeBacon % 6 == 0:
-            freeBacon += freeBacon // 6
-
-        return freeBacon
+        return free_bacon(x)
 
     def useFreeBacon():
         #continuous if statements vs if elif?
@@ -530,21 +1079,21 @@ def final_strategy(score, opponent_score):
     def expectedValue(n, m):
         """returns the expected(averaged) score in one turn given n number of dice each with m number of sides"""
         """return value also takes into account of the pig out rule and touchdown rule"""
-        return 0 
+        return expected_turn_score(n, m, not is49ers(), opponent_score)
 
     def chanceOfExact(x,n,m):
         """returns the chance of getting an exact score of x in one turn given n number of dice each with m number of sides"""
         """return value also takes into account of the pig out rule and touchdown rule"""
-        return 0
+        return chance_of_exact(x, n, m, not is49ers(), opponent_score)
 
     def chanceOfGettingGreater(x,n,m):
         """returns the chance of getting a score of x OR greater in one turn given n number of dice each with m number of sides"""
         """return value also takes into account of the pig out rule and touchdown rule"""
-        return 0
+        return chance_of_at_least(x, n, m, not is49ers(), opponent_score)
 
     def maxScore(n,m):
         """returns the maximum score a player can get in one turn using n number of dice each with m number of sides"""
-        return 0
+        return max_turn_score(n, m, not is49ers(), opponent_score)
 
     freeBacon = calculateFreeBacon(opponent_score)
     hogTied = isHogTied()
@@ -595,11 +1144,11 @@ def final_strategy_ver2(score, opponent_score):
 
     def isHogTied(total_score = current_sum):
 
-        return (total_score % 10) == 7
+        return allowed_dice(total_score) == 1
 
     def isHogWild(total_score = current_sum):
 
-        return (total_score != 0) and (total_score % 7) == 0
+        return (total_score != 0) and dice_sides(total_score) == 4
 
     def is49ers(input_score = score):
 
@@ -607,12 +1156,7 @@ def final_strategy_ver2(score, opponent_score):
 
     def calculateFreeBacon(x):
 
-        freeBacon = (1 + (x // 10))
-        
-        if freeBacon % 6 == 0:
-            freeBacon += freeBacon // 6
-
-        return freeBacon
+        return free_bacon(x)
 
     def useFreeBacon():
         #continuous if statements vs if elif?
@@ -667,21 +1211,21 @@ def final_strategy_ver2(score, opponent_score):
     def expectedValue(n, m):
         """returns the expected(averaged) score in one turn given n number of dice each with m number of sides"""
         """return value also takes into account of the pig out rule and touchdown rule"""
-        return 0 
+        return expected_turn_score(n, m, not is49ers(), opponent_score)
 
     def chanceOfExact(x,n,m):
         """returns the chance of getting an exact score of x in one turn given n number of dice each with m number of sides"""
         """return value also takes into account of the pig out rule and touchdown rule"""
-        return 0
+        return chance_of_exact(x, n, m, not is49ers(), opponent_score)
 
     def chanceOfGettingGreater(x,n,m):
         """returns the chance of getting a score of x OR greater in one turn given n number of dice each with m number of sides"""
         """return value also takes into account of the pig out rule and touchdown rule"""
-        return 0
+        return chance_of_at_least(x, n, m, not is49ers(), opponent_score)
 
     def maxScore(n,m):
         """returns the maximum score a player can get in one turn using n number of dice each with m number of sides"""
-        return 0
+        return max_turn_score(n, m, not is49ers(), opponent_score)
 
     freeBacon = calculateFreeBacon(opponent_score)
     hogTied = isHogTied()
@@ -702,9 +1246,170 @@ def final_strategy_ver2(score, opponent_score):
 
 
 def final_strategy_test():
-    """Compares final strategy to the baseline strategy."""
+    """Compares final strategy to the baseline strategy.
+
+    Both win rates are kept in RESULT_CACHE, so the test only computes them
+    again after final_strategy changes.
+    """
+    from resultcache import ResultCache
     print('-- Testing final_strategy --')
-    print('Win rate:', compare_strategies(final_strategy))
+    with ResultCache(RESULT_CACHE) as cache:
+        print('Win rate:', compare_strategies(final_strategy, cache=cache))
+        print('Exact win rate:', compare_strategies(final_strategy, exact=True,
+                                                    cache=cache))
+
+RESULT_CACHE = 'result_cache.json'
+EXPERIMENT_STORE = 'experiments.jsonl'
+TOURNAMENT_CACHE = 'tournament_cache.json'
+TOURNAMENT_SEED = 61     # Seed of the dice of the cached matches.
+KERNEL_CACHE = 'kernel_cache'
+
+def run_tournament():
+    """Play every strategy in this file against every other and report a
+    matrix of win rates and a rating for each strategy.
+
+    Finished matches are kept in TOURNAMENT_CACHE, so later tournaments only
+    play the matches of new or changed strategies, with the dice seeded by
+    TOURNAMENT_SEED.  The transition kernel of
+    the optimal strategy's solver is kept in KERNEL_CACHE.
+    """
+    import kernel
+    from solver import solve
+    from tournament import round_robin, print_tournament
+    strategies = {'always_roll({0})'.format(n): always_roll(n)
+                  for n in range(MAX_NUM_ROLLS + 1)}
+    strategies['comeback(10)'] = make_comeback_strategy(10)
+    strategies['mean(5)'] = make_mean_strategy(5)
+    strategies['final_strategy'] = final_strategy
+    kernel.cache_dir = KERNEL_CACHE
+    strategies['optimal'] = solve(goal=goal).strategy
+    with make_executor() as executor:
+        result = round_robin(strategies, 500, goal, TOURNAMENT_SEED,
+                             executor=executor, cache_path=TOURNAMENT_CACHE)
+    print_tournament(result)
+
+BENCHMARK_RESULTS = 'benchmark.json'
+BENCHMARK_BASELINE = 'benchmark_baseline.json'
+# Modules that are slow to import and that import hog must not load.
+STARTUP_EXCLUDED = ('re', 'json', 'mmap', 'struct', 'hashlib')
+
+def benchmark():
+    """Measure the speed of the simulator, the dice, final_strategy and the
+    startup of new Python processes that import hog, check that
+    final_strategy decides like reference_final_strategy and that importing
+    hog loads none of STARTUP_EXCLUDED, and profile the decisions of both
+    strategies in games against the baseline.
+
+    The results are written to BENCHMARK_RESULTS and compared with those in
+    BENCHMARK_BASELINE, if it exists, to report regressions.  To make a run
+    the baseline, copy its results to BENCHMARK_BASELINE.
+    """
+    import contextlib, io, os, subprocess, sys, tempfile
+    from batch import play_many
+    from benchmark import Benchmark, run_benchmarks, compare, save, load
+    from dice import FairDice, ReplayDice
+
+    def games(strategy0, strategy1):
+        def play_games(n):
+            for _ in range(n):
+                play(strategy0, strategy1)
+        return play_games
+
+    def turns(n):
+        for i in range(n):
+            take_turn(i % (MAX_NUM_ROLLS + 1), i % goal)
+
+    def rolls(dice):
+        def roll(n):
+            for _ in range(n):
+                dice()
+        return roll
+
+    def replay_rolls(n):
+        rolls(ReplayDice(6, bytes(range(1, 7)) * (n // 6 + 1)))(n)
+
+    scores = [(score, opponent_score) for score in range(goal)
+              for opponent_score in range(goal)]
+    def strategy_calls(strategy):
+        def call(n):
+            for score, opponent_score in scores[:n]:
+                strategy(score, opponent_score)
+        return call
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    loaded = subprocess.run(
+        (sys.executable, '-c', 'import sys; before = set(sys.modules); '
+         'import hog; print(*set(sys.modules) - before)'),
+        cwd=here, check=True, capture_output=True, text=True).stdout.split()
+    excluded = sorted(set(STARTUP_EXCLUDED).intersection(loaded))
+    assert not excluded, 'import hog loads ' + ', '.join(excluded)
+
+    def startups(*command):
+        def start(n):
+            for _ in range(n):
+                subprocess.run((sys.executable,) + command, cwd=here, check=True,
+                               stdout=subprocess.DEVNULL)
+        return start
+
+    def experiments(n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(n):
+                # A new store and cache every run, so no games are reused and
+                # the user's own EXPERIMENT_STORE and RESULT_CACHE are left alone.
+                with tempfile.TemporaryDirectory() as directory:
+                    run_experiments(store_path=os.path.join(directory,
+                                                            EXPERIMENT_STORE),
+                                    cache_path=os.path.join(directory,
+                                                            RESULT_CACHE))
+
+    benchmarks = [
+        Benchmark('play: always_roll(5) vs always_roll(5)', 'games',
+                  games(always_roll(5), always_roll(5)), 500),
+        Benchmark('play: final_strategy vs always_roll(5)', 'games',
+                  games(final_strategy, always_roll(5)), 500),
+        Benchmark('play: final_strategy vs final_strategy', 'games',
+                  games(final_strategy, final_strategy), 500),
+        Benchmark('play_many: final_strategy vs always_roll(5)', 'games',
+                  lambda n: play_many(final_strategy, always_roll(5), n), 10000),
+        Benchmark('take_turn', 'turns', turns, 20000),
+        Benchmark('dice: six_sided_dice', 'rolls', rolls(six_sided_dice), 100000),
+        Benchmark('dice: FairDice.roll_many', 'rolls',
+                  lambda n: FairDice(6, 0).roll_many(n), 100000),
+        Benchmark('dice: make_test_dice', 'rolls',
+                  rolls(make_test_dice(1, 2, 3, 4, 5, 6)), 100000),
+        Benchmark('dice: ReplayDice', 'rolls', replay_rolls, 100000),
+        Benchmark('final_strategy', 'calls', strategy_calls(final_strategy),
+                  len(scores)),
+        Benchmark('reference_final_strategy', 'calls',
+                  strategy_calls(reference_final_strategy), len(scores)),
+        Benchmark('startup: import hog', 'starts', startups('-c', 'import hog'), 10),
+        Benchmark('startup: hog.py --help', 'starts', startups('hog.py', '--help'), 10),
+        Benchmark('run_experiments', 'runs', experiments, 1, trials=1, warmup=0),
+    ]
+    results = run_benchmarks(benchmarks)
+    same = all(final_strategy(*pair) == reference_final_strategy(*pair)
+               for pair in scores)
+    rates = {name: results['results'][name]['median']
+             for name in ('final_strategy', 'reference_final_strategy')}
+    print('final_strategy is {0:.1f} times as fast as reference_final_strategy'
+          ' with {1} decisions'.format(
+              rates['final_strategy'] / rates['reference_final_strategy'],
+              'identical' if same else 'DIFFERENT'))
+    results['final_strategy_matches_reference'] = same
+    results['profiles'] = {}
+    for strategy in (final_strategy, reference_final_strategy):
+        profiles = compare_strategies(strategy, batch=False, profile=True).profiles
+        profiles[0].report()
+        results['profiles'][profiles[0].name] = profiles[0].summary()
+    save(results, BENCHMARK_RESULTS)
+    print('Results written to', BENCHMARK_RESULTS)
+    if os.path.exists(BENCHMARK_BASELINE):
+        regressions = compare(results, load(BENCHMARK_BASELINE))
+        for name, before, after in regressions:
+            print('REGRESSION {0}: {1:,.1f} -> {2:,.1f} per second ({3:+.0%})'.format(
+                name, before, after, after / before - 1))
+        if not regressions:
+            print('No regressions against', BENCHMARK_BASELINE)
 
 
 
@@ -733,8 +1438,8 @@ def interactive_strategy(score, opponent_score):
 
 def play_interactively():
     """Play one interactive game."""
-    global commentary
-    commentary = True
+    global commentator
+    commentator = ConsoleCommentator()
     print("Shall we play a game?")
     winner = play(interactive_strategy, always_roll(5))
     if winner == 0:
@@ -744,8 +1449,8 @@ def play_interactively():
 
 def play_basic():
     """Play one game in which two basic strategies compete."""
-    global commentary
-    commentary = True
+    global commentator
+    commentator = ConsoleCommentator()
     winner = play(always_roll(5), always_roll(6))
     if winner == 0:
         print("Player 0, who always wants to roll 5, won.")
@@ -764,8 +1469,19 @@ def run(*args):
     parser.add_argument('--play_interactively', '-p', action='store_true')
     parser.add_argument('--play_basic', '-b', action='store_true')
     parser.add_argument('--run_experiments', '-r', action='store_true')
+    parser.add_argument('--run_grid_experiments', '-g', action='store_true',
+                        help='run the experiments and the grid races')
     parser.add_argument('--final_strategy_test', '-f', action='store_true')
+    parser.add_argument('--run_tournament', '-T', action='store_true')
+    parser.add_argument('--benchmark', '-B', action='store_true')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='number of processes for experiments')
+    parser.add_argument('--metrics', '-m', metavar='PATH',
+                        help='write metrics of experiments to a JSON file')
     args = parser.parse_args()
+    global workers, metrics_path
+    workers = args.__dict__.pop('workers')
+    metrics_path = args.__dict__.pop('metrics')
     for name, execute in args.__dict__.items():
         if execute:
             globals()[name]()
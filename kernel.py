@@ -0,0 +1,96 @@
+"""Turn transition kernels of variants of Hog, cached on disk.
+
+The kernel of a variant lists, for every state (score, opponent_score) below
+its goal, the (points, chance) outcomes of a turn for each number of dice the
+player may roll there.  Exact analysis of a variant (see exact.py and
+solver.py) reads nothing else about the rules.  For the standard dice the
+outcomes come from the tables of outcomes.py; for other dice they are computed
+by convolution, which is where most of the time of building a kernel goes.
+
+Kernels are kept in memory, and with a cache directory, also pickled to a file
+named after KERNEL_VERSION and the fingerprint of their HogRules, so that
+analysis of a variant seen before, in this process or an earlier one, starts
+without building its kernel again.  KERNEL_VERSION must change whenever the
+layout of a kernel or the way it is built changes, so that pickles of the old
+kernels are no longer read.
+"""
+
+from collections import namedtuple
+import os
+import pickle
+
+from outcomes import DICE_SIDES, dice_outcomes, turn_outcomes
+from rules import STANDARD, HogRules
+
+cache_dir = None    # Directory of kernels pickled to disk, or None for none.
+KERNEL_VERSION = 1  # Version of the kernels pickled to disk.
+
+TransitionKernel = namedtuple('TransitionKernel', ['rules', 'choices'])
+TransitionKernel.__doc__ = """The kernel of RULES: CHOICES[score * goal +
+opponent_score] is a tuple whose entry n holds the outcomes of rolling n dice,
+for every number of dice allowed in that state."""
+
+_kernels = {}
+
+def build_kernel(rules):
+    """Return the TransitionKernel of the HogRules RULES.
+
+    >>> kernel = build_kernel(HogRules(goal=20))
+    >>> len(kernel.choices), len(kernel.choices[0 * 20 + 17])
+    (400, 2)
+    >>> [points for points, chance in kernel.choices[1 * 20 + 2][1]]
+    [1, 2, 3, 4, 5, 7]
+    """
+    tables = rules.tables()
+    standard = (rules.touchdown == STANDARD.touchdown and
+                set(tables.dice_sides) <= set(DICE_SIDES))
+    dice = {}
+    def roll(num_rolls, sides, ones_lose):
+        if standard and num_rolls <= STANDARD.max_dice:
+            return turn_outcomes(num_rolls, sides, ones_lose)
+        if (num_rolls, sides, ones_lose) not in dice:
+            dice[num_rolls, sides, ones_lose] = dice_outcomes(
+                num_rolls, sides, ones_lose, rules.bonus)
+        return dice[num_rolls, sides, ones_lose]
+
+    choices = []
+    for score in range(rules.goal):
+        ones_lose = tables.ones_lose[score]
+        for opponent_score in range(rules.goal):
+            total = score + opponent_score
+            sides = tables.dice_sides[total]
+            bacon = ((tables.free_bacon[opponent_score], 1.0),)
+            choices.append((bacon,) + tuple(roll(n, sides, ones_lose) for n in
+                                            range(1, tables.allowed_dice[total] + 1)))
+    return TransitionKernel(rules, choices)
+
+def transition_kernel(rules=None, directory=None):
+    """Return the TransitionKernel of RULES (the standard rules by default),
+    building it only if it is neither in memory nor cached in DIRECTORY,
+    which defaults to cache_dir.
+
+    >>> transition_kernel(HogRules(goal=30)) is transition_kernel(HogRules(30))
+    True
+    """
+    if rules is None:
+        rules = STANDARD
+    if rules in _kernels:
+        return _kernels[rules]
+    if directory is None:
+        directory = cache_dir
+    path = None
+    if directory is not None:
+        path = os.path.join(directory, 'kernel-v{0}-{1}.pickle'.format(
+            KERNEL_VERSION, rules.fingerprint()))
+    if path is not None and os.path.exists(path):
+        with open(path, 'rb') as kernel_file:
+            kernel = pickle.load(kernel_file)
+    else:
+        kernel = build_kernel(rules)
+        if path is not None:
+            os.makedirs(directory, exist_ok=True)
+            with open(path + '.tmp', 'wb') as kernel_file:
+                pickle.dump(kernel, kernel_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+    _kernels[rules] = kernel
+    return kernel
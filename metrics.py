@@ -0,0 +1,121 @@
+"""Counters of how often the rules of Hog fire and where simulation time goes.
+
+Metrics are off unless a Metrics object is the collector.  Every counting site
+checks that collector first, so with metrics off each site costs one global
+lookup, and batch.play_many keeps its fast loop.  With metrics on, hog.play
+and its helpers count:
+
+    games           Games played.
+    turns           Turns taken.
+    dice            Dice rolled.
+    hog_tied        Turns on which Hog Tied cut the dice requested to one.
+    hog_wild        Turns on which dice were rolled, four-sided by Hog Wild.
+    free_bacon      Turns on which no dice were rolled.
+    touchdown       Turns whose score was a multiple of 6.
+    forty_niners    Turns on which a 1 was rolled from 49 points.
+    pig_out         Turns on which a 1 was rolled and the turn scored 1.
+
+and seconds spent choosing the number of dice (strategy) and taking turns,
+which is mostly rolling dice (dice).  batch.play_many counts the same things,
+except that its strategies decide by looking up tables: instead of strategy
+time, it counts the seconds spent compiling the strategies into tables
+(compile).
+
+Worker processes count into their own collectors, and parallel.submit_match
+merges their snapshots into the collector of the process that submitted them.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+
+from rules import STANDARD
+
+class Metrics:
+    """Counts and timings of simulated games.
+
+    >>> metrics = Metrics()
+    >>> metrics.record_turn(0, 3, 3, 10, 4, [1, 2, 3], 4)
+    >>> metrics.end_game()
+    >>> merged = Metrics()
+    >>> merged.merge(metrics.snapshot())
+    >>> merged.merge(metrics.snapshot())
+    >>> merged.counts['pig_out'], merged.counts['dice'], merged.counts['hog_wild']
+    (2, 6, 2)
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.seconds = Counter()
+
+    def record_turn(self, player, requested, granted, score, opponent_score,
+                    rolls=(), sides=0, game=0, points=None, flags=0,
+                    rules=STANDARD):
+        """Count a turn, with the arguments of gamelog.GameRecorder.record_turn,
+        so that a collector can record the turns of batch.play_many."""
+        from gamelog import (HOG_TIED, HOG_WILD, FREE_BACON, TOUCHDOWN,
+                             FORTY_NINERS, PIG_OUT, score_turn)
+        counts = self.counts
+        counts['turns'] += 1
+        counts['dice'] += granted
+        if points is None:
+            flags = score_turn(requested, granted, rolls, score, opponent_score,
+                               rules)[1]
+        if flags & HOG_TIED:
+            counts['hog_tied'] += 1
+        if flags & HOG_WILD:
+            counts['hog_wild'] += 1
+        if flags & FREE_BACON:
+            counts['free_bacon'] += 1
+        if flags & TOUCHDOWN:
+            counts['touchdown'] += 1
+        if flags & FORTY_NINERS:
+            counts['forty_niners'] += 1
+        if flags & PIG_OUT:
+            counts['pig_out'] += 1
+
+    def end_game(self, games=1):
+        self.counts['games'] += games
+
+    def merge(self, snapshot):
+        """Add the counts and seconds of SNAPSHOT, as returned by snapshot."""
+        self.counts.update(snapshot['counts'])
+        self.seconds.update(snapshot['seconds'])
+
+    def snapshot(self):
+        """Return the counts and seconds so far as a dict of plain dicts,
+        with the average number of turns per game."""
+        games = self.counts['games']
+        return {'counts': dict(self.counts), 'seconds': dict(self.seconds),
+                'turns_per_game': self.counts['turns'] / games if games else None}
+
+    def write(self, path):
+        """Write a snapshot to the JSON file at PATH."""
+        import json
+        with open(path, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file, indent=2, sort_keys=True)
+
+collector = None    # The Metrics that counts now, or None when metrics are off.
+
+def enable():
+    """Turn metrics on, if they are off, and return the collector."""
+    global collector
+    if collector is None:
+        collector = Metrics()
+    return collector
+
+def disable():
+    """Turn metrics off and return the collector that was counting, if any."""
+    global collector
+    metrics, collector = collector, None
+    return metrics
+
+@contextmanager
+def collecting():
+    """Count into a new collector within a with statement, then restore the
+    previous one.  The new collector is the value of the with statement."""
+    global collector
+    previous, collector = collector, Metrics()
+    try:
+        yield collector
+    finally:
+        collector = previous
@@ -0,0 +1,166 @@
+"""Exact probability distributions of the score for one turn of Hog.
+
+The distributions are computed once, the first time one is looked up, by
+convolving the outcomes of a single die.  They already include the Pig Out
+rule (any 1 scores a single point unless ONES_LOSE is false, as under the
+49ers rule) and the Touchdown rule, so every lookup below is a single index
+into a precomputed table.
+
+A distribution is a tuple indexed by turn score: entry k is the chance of
+scoring exactly k points this turn.
+"""
+
+from itertools import product
+
+from rules import MAX_NUM_ROLLS, touchdown, free_bacon
+
+DICE_SIDES = (4, 6)
+
+def _roll_sums(num_rolls, faces, sides):
+    """Return a list whose entry k is the chance that NUM_ROLLS dice with
+    SIDES sides all come up in FACES and add up to k."""
+    sums = [1.0]
+    for _ in range(num_rolls):
+        next_sums = [0.0] * (len(sums) + sides)
+        for total, chance in enumerate(sums):
+            if chance:
+                for face in faces:
+                    next_sums[total + face] += chance / sides
+        sums = next_sums
+    return sums
+
+def _make_distribution(num_rolls, sides, ones_lose, bonus=touchdown):
+    """Compute the turn score distribution for rolling NUM_ROLLS dice, where
+    BONUS applies the Touchdown rule."""
+    if ones_lose:
+        sums = _roll_sums(num_rolls, range(2, sides + 1), sides)
+        sums[1] += 1 - sum(sums)   # Every other outcome is a Pig Out.
+    else:
+        sums = _roll_sums(num_rolls, range(1, sides + 1), sides)
+    distribution = [0.0] * (max(map(bonus, range(len(sums)))) + 1)
+    for points, chance in enumerate(sums):
+        if chance:
+            distribution[bonus(points)] += chance
+    while not distribution[-1]:
+        distribution.pop()
+    return tuple(distribution)
+
+def _tail(distribution):
+    """Return a tuple whose entry k is the chance of scoring k or more."""
+    tail = [0.0] * (len(distribution) + 1)
+    for points in range(len(distribution) - 1, -1, -1):
+        tail[points] = tail[points + 1] + distribution[points]
+    return tuple(tail)
+
+_distributions = {}
+_outcomes = {}
+_tails = {}
+_means = {}
+
+def _lookup(tables, num_rolls, sides, ones_lose):
+    """Return the entry of TABLES, one of the tables above, for rolling
+    NUM_ROLLS dice, building all the tables if they are still empty."""
+    if not _distributions:
+        for key in product(range(1, MAX_NUM_ROLLS + 1), DICE_SIDES, (True, False)):
+            distribution = _make_distribution(*key)
+            _outcomes[key] = tuple((k, p) for k, p in enumerate(distribution) if p)
+            _tails[key] = _tail(distribution)
+            _means[key] = sum(k * p for k, p in enumerate(distribution))
+            _distributions[key] = distribution
+    return tables[num_rolls, sides, ones_lose]
+
+def dice_outcomes(num_rolls, sides, ones_lose, bonus=touchdown):
+    """Return the (points, chance) outcomes of rolling NUM_ROLLS dice with
+    SIDES sides, for dice and rules that need not be standard: BONUS is the
+    Touchdown rule, such as HogRules.bonus.  Unlike turn_outcomes, the
+    outcomes are computed anew on every call.
+
+    >>> dice_outcomes(1, 3, False, lambda points: points)
+    ((1, 0.3333333333333333), (2, 0.3333333333333333), (3, 0.3333333333333333))
+    """
+    distribution = _make_distribution(num_rolls, sides, ones_lose, bonus)
+    return tuple((k, p) for k, p in enumerate(distribution) if p)
+
+def turn_distribution(num_rolls, sides=6, ones_lose=True, opponent_score=0):
+    """Return the distribution of the turn score for rolling NUM_ROLLS dice.
+
+    Rolling zero dice always scores Free Bacon against OPPONENT_SCORE.
+
+    >>> [round(p, 3) for p in turn_distribution(1)]
+    [0.0, 0.167, 0.167, 0.167, 0.167, 0.167, 0.0, 0.167]
+    >>> turn_distribution(0, opponent_score=25)
+    (0.0, 0.0, 0.0, 1.0)
+    """
+    if num_rolls == 0:
+        points = free_bacon(opponent_score)
+        return (0.0,) * points + (1.0,)
+    return _lookup(_distributions, num_rolls, sides, ones_lose)
+
+def turn_outcomes(num_rolls, sides=6, ones_lose=True, opponent_score=0):
+    """Return the possible turn scores for rolling NUM_ROLLS dice as a tuple
+    of (points, chance) pairs, leaving out scores that cannot happen.
+
+    >>> turn_outcomes(0, opponent_score=42)
+    ((5, 1.0),)
+    >>> [points for points, chance in turn_outcomes(1, 4)]
+    [1, 2, 3, 4]
+    """
+    if num_rolls == 0:
+        return ((free_bacon(opponent_score), 1.0),)
+    return _lookup(_outcomes, num_rolls, sides, ones_lose)
+
+def expected_turn_score(num_rolls, sides=6, ones_lose=True, opponent_score=0):
+    """Return the expected turn score for rolling NUM_ROLLS dice.
+
+    >>> round(expected_turn_score(1, 4), 2)
+    2.5
+    >>> expected_turn_score(0, opponent_score=71)
+    8
+    """
+    if num_rolls == 0:
+        return free_bacon(opponent_score)
+    return _lookup(_means, num_rolls, sides, ones_lose)
+
+def chance_of_exact(points, num_rolls, sides=6, ones_lose=True,
+                    opponent_score=0):
+    """Return the chance of scoring exactly POINTS for rolling NUM_ROLLS dice.
+
+    >>> chance_of_exact(7, 1)
+    0.16666666666666666
+    >>> chance_of_exact(6, 1)
+    0.0
+    """
+    if num_rolls == 0:
+        return 1.0 if points == free_bacon(opponent_score) else 0.0
+    distribution = _lookup(_distributions, num_rolls, sides, ones_lose)
+    if 0 <= points < len(distribution):
+        return distribution[points]
+    return 0.0
+
+def chance_of_at_least(points, num_rolls, sides=6, ones_lose=True,
+                       opponent_score=0):
+    """Return the chance of scoring POINTS or more for rolling NUM_ROLLS dice.
+
+    >>> round(chance_of_at_least(2, 1), 3)
+    0.833
+    >>> chance_of_at_least(1, 10)
+    1.0
+    """
+    if num_rolls == 0:
+        return 1.0 if points <= free_bacon(opponent_score) else 0.0
+    tail = _lookup(_tails, num_rolls, sides, ones_lose)
+    if points <= 0:
+        return 1.0
+    if points < len(tail):
+        return min(tail[points], 1.0)
+    return 0.0
+
+def max_turn_score(num_rolls, sides=6, ones_lose=True, opponent_score=0):
+    """Return the largest possible turn score for rolling NUM_ROLLS dice.
+
+    >>> max_turn_score(2), max_turn_score(5, 4)
+    (14, 21)
+    """
+    if num_rolls == 0:
+        return free_bacon(opponent_score)
+    return len(_lookup(_distributions, num_rolls, sides, ones_lose)) - 1
@@ -0,0 +1,60 @@
+"""Paired comparisons of strategies with common random numbers.
+
+Most of the noise in a sampled win rate comes from the dice, not from the
+strategies.  A paired comparison plays game i of both seatings on the same
+random stream (common random numbers), and can also pair every game with an
+antithetic game in which each die shows the opposite face.  The win rate is
+then averaged over these groups of correlated games, whose luck largely
+cancels out, and the variance reduction reports how many times fewer games
+this needs than independent games for the same precision.
+"""
+
+from collections import namedtuple
+import random
+
+from batch import play_many
+from compiled import compile_strategy
+from stats import Estimate, RunningStats
+
+PairedEstimate = namedtuple('PairedEstimate', ['win_rate', 'variance_reduction'])
+
+def compare_paired(strategy, baseline, num_samples=1000, goal=100, seed=None,
+                   antithetic=False, confidence=0.95):
+    """Return a PairedEstimate of the win rate of STRATEGY against BASELINE
+    from NUM_SAMPLES paired games in each seating.
+
+    The win rate is an Estimate whose interval accounts for the pairing.  The
+    variance reduction is the variance of the win rate that the same number
+    of independent games would give, divided by that of the paired games.
+
+    >>> roll = lambda n: (lambda score, opponent_score: n)
+    >>> result = compare_paired(roll(6), roll(5), 2000, seed=61, antithetic=True)
+    >>> result.win_rate.samples, result.variance_reduction > 1
+    (4000, True)
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    strategy = compile_strategy(strategy, goal)
+    baseline = compile_strategy(baseline, goal)
+    first = play_many(strategy, baseline, num_samples, goal, seed, True, antithetic)
+    second = play_many(baseline, strategy, num_samples, goal, seed, True, antithetic)
+
+    group = 2 if antithetic else 1
+    paired, independent = RunningStats(), RunningStats()
+    for start in range(0, num_samples, group):
+        games = range(start, min(start + group, num_samples))
+        wins = [1 - first[game] for game in games] + [second[game] for game in games]
+        for win in wins:
+            independent.add(win)
+        paired.add(sum(wins) / len(wins))
+
+    half_width = paired.half_width(confidence)
+    win_rate = Estimate(paired.mean, paired.mean - half_width,
+                        paired.mean + half_width, independent.count, confidence)
+    paired_variance = paired.variance / paired.count
+    independent_variance = independent.variance / independent.count
+    if paired_variance:
+        reduction = independent_variance / paired_variance
+    else:
+        reduction = float('inf')
+    return PairedEstimate(win_rate, reduction)
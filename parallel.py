@@ -0,0 +1,263 @@
+"""Simulating many games across a pool of worker processes.
+
+Games are split into shards of a fixed size.  Each shard is played by
+batch.play_many with its own random stream, seeded from a master seed and the
+position of the shard, so the results only depend on the master seed and never
+on how many workers there are or which worker plays which shard.  Without an
+executor the shards are played one after another in this process, with exactly
+the same results.
+
+Strategies are sent to worker processes by pickling.  Closures such as those
+returned by always_roll cannot be pickled, so every strategy is sent either
+as a CompiledStrategy or as a StrategySpec that names a strategy in hog.py.
+"""
+
+from collections import namedtuple
+from importlib import import_module
+import random
+
+from batch import play_many
+from checkpoint import shard_key
+from compiled import CompiledStrategy, compile_strategy
+import metrics
+from rules import MAX_NUM_ROLLS
+
+SHARD_SIZE = 1000
+
+class StrategySpec(namedtuple('StrategySpec', ['name', 'args', 'module'])):
+    """A picklable description of a strategy in MODULE.
+
+    With ARGS, the strategy is NAME(*ARGS), as for always_roll(5) or
+    make_comeback_strategy(10).  Without ARGS, NAME is the strategy itself,
+    as for final_strategy.
+
+    >>> StrategySpec('always_roll', (5,)).resolve()(0, 0)
+    5
+    """
+
+    def __new__(cls, name, args=None, module='hog'):
+        return super().__new__(cls, name, args, module)
+
+    def resolve(self):
+        """Return the strategy function described by this spec."""
+        named = getattr(import_module(self.module), self.name)
+        if self.args is None:
+            return named
+        return named(*self.args)
+
+def portable(strategy, goal=100):
+    """Return STRATEGY in a form that can be sent to a worker process."""
+    if isinstance(strategy, (StrategySpec, CompiledStrategy)):
+        return strategy
+    return compile_strategy(strategy, goal)
+
+CHECK_STRIDE = 37   # Every CHECK_STRIDE-th state is decided again by tabulated.
+
+def tabulated(strategy, goal=100):
+    """Return STRATEGY in portable form if it can be tabulated, or None if it
+    is not a deterministic function of the two scores.
+
+    A strategy function is compiled, then called again in every CHECK_STRIDE-th
+    state, and it can be tabulated only if it decides as its table does in all
+    of them, which a random strategy or one whose decisions depend on earlier
+    calls is very unlikely to do.
+
+    >>> import random
+    >>> tabulated(lambda score, opponent_score: random.randrange(11)) is None
+    True
+    >>> tabulated(lambda score, opponent_score: 5)(3, 4)
+    5
+    """
+    if isinstance(strategy, (StrategySpec, CompiledStrategy)):
+        return strategy
+    compiled = compile_strategy(strategy, goal)
+    table = compiled.table
+    for state in range(0, goal * goal, CHECK_STRIDE):
+        if min(strategy(*divmod(state, goal)), MAX_NUM_ROLLS) != table[state]:
+            return None
+    return compiled
+
+def _shard_seed(seed, *position):
+    """Return the seed of the random stream for the shard at POSITION."""
+    return '/'.join(map(str, (seed,) + position))
+
+_resolved = {}   # Strategies compiled from specs in this process, by spec.
+
+def _resolve(strategy, goal):
+    """Return STRATEGY compiled for GOAL, resolving it first if it is a spec."""
+    if not isinstance(strategy, StrategySpec):
+        return strategy
+    if (strategy, goal) not in _resolved:
+        _resolved[strategy, goal] = compile_strategy(strategy.resolve(), goal)
+    return _resolved[strategy, goal]
+
+def _play_shard(strategy0, strategy1, n_games, goal, seed, common=False,
+                antithetic=False, instrument=False):
+    """Return how many of N_GAMES games player 1 wins, and with INSTRUMENT,
+    also a metrics snapshot of the shard."""
+    if instrument:
+        with metrics.collecting() as shard_metrics:
+            wins = _play_shard(strategy0, strategy1, n_games, goal, seed,
+                               common, antithetic)
+        return wins, shard_metrics.snapshot()
+    strategy0, strategy1 = _resolve(strategy0, goal), _resolve(strategy1, goal)
+    return sum(play_many(strategy0, strategy1, n_games, goal, seed, common,
+                         antithetic))
+
+def _shard_wins(future):
+    """Return the wins of a finished shard, merging its metrics snapshot into
+    the collector of this process if it has one."""
+    result = future.result()
+    if type(result) is tuple:
+        result, snapshot = result
+        if metrics.collector is not None:
+            metrics.collector.merge(snapshot)
+    return result
+
+def _shards(num_samples, shard_size):
+    """Return the number of games in each shard of NUM_SAMPLES games."""
+    full, rest = divmod(num_samples, shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+class Match:
+    """Games between a strategy and an opponent in both seatings, submitted
+    by submit_match and possibly still being played.
+
+    With a STORE, KEYS holds the store key of each shard, first seating first,
+    and every shard's wins are stored as soon as they are collected.  SHARDS
+    holds the number of games in each shard of a seating.  Once the wins are
+    collected, PLAYED holds the wins and games of the shards that were played
+    rather than found in the store.
+    """
+
+    def __init__(self, num_samples, as_first, as_second, store=None, keys=(),
+                 shards=()):
+        self.num_samples = num_samples
+        self.as_first, self.as_second = as_first, as_second
+        self.store, self.keys = store, keys
+        self.shards = shards
+        self.played = None
+
+    def wins(self):
+        """Wait for the games and return how many the strategy won."""
+        shard_wins = []
+        played_wins = played_games = 0
+        for index, future in enumerate(self.as_first + self.as_second):
+            wins = _shard_wins(future)
+            shard_wins.append(wins)
+            if self.store is None or self.store.get(self.keys[index]) is None:
+                if self.store is not None:
+                    self.store.put(self.keys[index], wins)
+                games = self.shards[index % len(self.shards)]
+                played_wins += wins if index >= len(self.as_first) else games - wins
+                played_games += games
+        self.played = played_wins, played_games
+        first_wins = self.num_samples - sum(shard_wins[:len(self.as_first)])
+        second_wins = sum(shard_wins[len(self.as_first):])
+        return first_wins + second_wins
+
+def fingerprint(strategy, goal=100):
+    """Return the fingerprint of STRATEGY compiled for GOAL.
+
+    >>> fingerprint(lambda score, opponent_score: 5) == fingerprint(
+    ...     StrategySpec('always_roll', (5,)))
+    True
+    """
+    return _resolve(portable(strategy, goal), goal).fingerprint()
+
+def submit_match(strategy, opponent, num_samples=100, goal=100, seed=None,
+                 executor=None, shard_size=SHARD_SIZE, common=False,
+                 antithetic=False, key=(), store=None):
+    """Submit NUM_SAMPLES games of STRATEGY against OPPONENT in each seating
+    to EXECUTOR, or play them now without one, and return their Match.
+
+    The dice of each shard are seeded by SEED, KEY, the seating and the
+    position of the shard, or by SEED and the shard alone with COMMON or
+    ANTITHETIC, so that every match with the same SEED plays the same dice.
+    If metrics are on, every shard reports its metrics when its wins are
+    collected.  Shards already in STORE, a checkpoint.ResultStore, are not
+    played again, and new shards are added to it.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    strategy, opponent = portable(strategy, goal), portable(opponent, goal)
+    submit = executor.submit if executor is not None else _run_now
+    shards = _shards(num_samples, shard_size)
+    if common or antithetic:
+        seeds = [(_shard_seed(seed, shard),) * 2 for shard in range(len(shards))]
+    else:
+        seeds = [(_shard_seed(seed, *key, 0, shard),
+                  _shard_seed(seed, *key, 1, shard))
+                 for shard in range(len(shards))]
+    instrument = metrics.collector is not None
+    keys = [None] * (2 * len(shards))
+    if store is not None:
+        prints = fingerprint(strategy, goal), fingerprint(opponent, goal)
+        keys = [shard_key(prints[seat], prints[1 - seat], goal, n,
+                          shard_seeds[seat], common, antithetic)
+                for seat in (0, 1) for n, shard_seeds in zip(shards, seeds)]
+    stored = [store.get(key) if store is not None else None for key in keys]
+
+    def play(index, *args):
+        if stored[index] is not None:
+            return _Done(stored[index])
+        return submit(_play_shard, *args, common, antithetic, instrument)
+
+    as_first = [play(index, strategy, opponent, n, goal, first_seed)
+                for index, (n, (first_seed, _)) in enumerate(zip(shards, seeds))]
+    as_second = [play(len(shards) + index, opponent, strategy, n, goal, second_seed)
+                 for index, (n, (_, second_seed)) in enumerate(zip(shards, seeds))]
+    return Match(num_samples, as_first, as_second, store, keys, shards)
+
+def win_counts(strategies, baseline, num_samples=100, goal=100, seed=None,
+               executor=None, shard_size=SHARD_SIZE, common=False,
+               antithetic=False, store=None):
+    """Return how many of 2 * NUM_SAMPLES games each of STRATEGIES wins
+    against BASELINE, playing NUM_SAMPLES games in each seating.
+
+    All games for all strategies are submitted to EXECUTOR at once, if given.
+    The same SEED gives the same results for any number of workers.  The dice
+    of a strategy are seeded by its fingerprint, not its place in STRATEGIES,
+    so its result does not depend on the other strategies.  With
+    COMMON, game i of both seatings and of every strategy rolls from the same
+    random stream (see batch.play_many), as do both games of each antithetic
+    pair with ANTITHETIC.  Shards found in STORE are not played again.
+
+    >>> strategies = [StrategySpec('always_roll', (n,)) for n in (4, 6)]
+    >>> baseline = StrategySpec('always_roll', (5,))
+    >>> wins = win_counts(strategies, baseline, 2500, seed=61)
+    >>> wins == win_counts(strategies, baseline, 2500, seed=61)
+    True
+    >>> win_counts(strategies[::-1], baseline, 2500, seed=61) == wins[::-1]
+    True
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    baseline = portable(baseline, goal)
+    matches = [submit_match(strategy, baseline, num_samples, goal, seed,
+                            executor, shard_size, common, antithetic,
+                            (fingerprint(strategy, goal),), store)
+               for strategy in strategies]
+    return [match.wins() for match in matches]
+
+def win_rates(strategies, baseline, num_samples=100, goal=100, seed=None,
+              executor=None, shard_size=SHARD_SIZE, common=False,
+              antithetic=False):
+    """Return the win rate of each of STRATEGIES against BASELINE, playing
+    NUM_SAMPLES games in each seating, as computed by win_counts."""
+    counts = win_counts(strategies, baseline, num_samples, goal, seed,
+                        executor, shard_size, common, antithetic)
+    return [wins / (2 * num_samples) for wins in counts]
+
+class _Done:
+    """A finished result with the interface of a concurrent.futures.Future."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+def _run_now(fn, *args):
+    """Call FN on ARGS in this process, like an executor's submit."""
+    return _Done(fn(*args))
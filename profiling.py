@@ -0,0 +1,157 @@
+"""Profiles of the decisions of strategies.
+
+A StrategyProfile wraps a strategy and is itself a strategy, so it can be
+passed to play, play_many or compare_strategies in place of the strategy it
+wraps.  For every decision it records how long the strategy took, the state
+(score, opponent_score) it decided in and the number of dice it returned.
+
+Decision times go into a LatencyHistogram, which, like an HDR histogram,
+counts times in buckets whose width grows with the time, so that every time
+is known to within about 6% (1 / 2 ** SUB_BUCKET_BITS) in a fixed amount of
+memory, and recording a time is a few integer operations.  Strategies
+compiled into tables (see compiled.py) call the strategy once per state, so
+the profile of a compiled strategy holds one decision for every state.
+"""
+
+from collections import Counter
+from time import perf_counter_ns
+
+SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+def _bucket(value):
+    """Return the index of the bucket that counts VALUE, a whole number.
+
+    >>> [_bucket(value) for value in (0, 31, 32, 33, 34, 64, 1000)]
+    [0, 31, 32, 32, 33, 48, 111]
+    """
+    if value < 2 * _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * _SUB_BUCKETS + (value >> shift)
+
+def _highest(index):
+    """Return the largest value counted by the bucket at INDEX.
+
+    >>> [_highest(_bucket(value)) for value in (31, 32, 1000)]
+    [31, 33, 1023]
+    """
+    if index < 2 * _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    return ((index - shift * _SUB_BUCKETS + 1) << shift) - 1
+
+class LatencyHistogram:
+    """Counts of times in nanoseconds, in buckets of about 6% of their time.
+
+    >>> histogram = LatencyHistogram()
+    >>> for ns in range(1, 1001):
+    ...     histogram.record(ns)
+    >>> histogram.count, histogram.percentile(50), histogram.percentile(99)
+    (1000, 511, 991)
+    >>> histogram.min, histogram.max, histogram.mean
+    (1, 1000, 500.5)
+    """
+
+    def __init__(self):
+        self.counts = [0] * (64 * _SUB_BUCKETS)
+        self.count = self.total = 0
+        self.min = self.max = None
+
+    def record(self, ns):
+        """Count one time of NS nanoseconds."""
+        self.counts[_bucket(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent):
+        """Return a time that PERCENT percent of the recorded times do not
+        exceed, to within the width of its bucket."""
+        if not self.count:
+            return None
+        rank = max(1, -(-percent * self.count // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_highest(index), self.max)
+
+    def merge(self, other):
+        """Add all the times counted by the LatencyHistogram OTHER."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        for bound, pick in (('min', min), ('max', max)):
+            values = [v for v in (getattr(self, bound), getattr(other, bound))
+                      if v is not None]
+            setattr(self, bound, pick(values) if values else None)
+
+class StrategyProfile:
+    """STRATEGY, recording its decision times in LATENCY, the states it
+    decided in in STATES and the numbers of dice it chose in DICE.  NAME
+    defaults to the name of STRATEGY.
+
+    >>> profile = StrategyProfile(lambda score, opponent_score: score % 3, 'mod3')
+    >>> [profile(score, 0) for score in range(5)]
+    [0, 1, 2, 0, 1]
+    >>> profile(4, 0), profile.latency.count, profile.states[4, 0], profile.dice
+    (1, 6, 2, Counter({1: 3, 0: 2, 2: 1}))
+    """
+
+    def __init__(self, strategy, name=None):
+        self.strategy = strategy
+        self.name = name or getattr(strategy, '__name__', repr(strategy))
+        self.latency = LatencyHistogram()
+        self.states = Counter()
+        self.dice = Counter()
+
+    def __call__(self, score, opponent_score):
+        start = perf_counter_ns()
+        num_rolls = self.strategy(score, opponent_score)
+        self.latency.record(perf_counter_ns() - start)
+        self.states[score, opponent_score] += 1
+        self.dice[num_rolls] += 1
+        return num_rolls
+
+    def summary(self, hottest=5):
+        """Return the profile as a dict of plain values: the number of calls,
+        percentiles of the latency in nanoseconds, the number of states seen
+        and the HOTTEST states called most often, and the dice chosen."""
+        latency = self.latency
+        return {'name': self.name,
+                'calls': latency.count,
+                'latency_ns': {'min': latency.min, 'mean': latency.mean,
+                               'p50': latency.percentile(50),
+                               'p90': latency.percentile(90),
+                               'p99': latency.percentile(99),
+                               'p99.9': latency.percentile(99.9),
+                               'max': latency.max},
+                'states': len(self.states),
+                'hottest_states': [[score, opponent_score, count] for
+                                   (score, opponent_score), count in
+                                   self.states.most_common(hottest)],
+                'dice': {num_rolls: self.dice[num_rolls] for num_rolls in sorted(self.dice)}}
+
+    def report(self, file=None):
+        """Print a summary of the profile to FILE or stdout."""
+        summary = self.summary()
+        latency = summary['latency_ns']
+        if not summary['calls']:
+            print(self.name + ': no calls', file=file)
+            return
+        print('{0}: {1} calls in {2} states, latency p50 {3:.2f} us, p90 {4:.2f} us,'
+              ' p99 {5:.2f} us, max {6:.2f} us'.format(
+                  self.name, summary['calls'], summary['states'],
+                  *[latency[key] / 1000 for key in ('p50', 'p90', 'p99', 'max')]),
+              file=file)
+        print('    dice chosen: ' + ', '.join(
+            '{0}: {1:.1%}'.format(num_rolls, count / summary['calls'])
+            for num_rolls, count in summary['dice'].items()), file=file)
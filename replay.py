@@ -0,0 +1,156 @@
+"""Replays of recorded games of Hog, and counterfactual games on their dice.
+
+A recorded game is reduced to its dice streams: for each player and each kind
+of die, the outcomes that player rolled, in order.  Replaying the streams of a
+game with the strategies that played it reproduces the game exactly.
+Replaying them with other strategies plays the counterfactual game in which
+each player rolls the same dice as before, for as long as they last, and then
+dice seeded by the game, so that counterfactual games are reproducible too.
+
+replay_dice turns the streams of one game into dice for hog.play, and
+replay_many replays a whole list of games in lockstep, reading the streams
+directly instead of building dice for every game.
+"""
+
+from array import array
+
+from compiled import strategy_table
+from dice import FairDice, ReplayDice
+from rules import dice_sides, rule_tables
+
+def game_streams(log):
+    """Return a dict from game numbers to the dice streams of every game in
+    LOG, a gamelog.GameLog or other iterable of gamelog.Turns.
+
+    The streams of a game are a pair, one for each player, of dicts from the
+    number of sides of a die to the bytes of the outcomes rolled with it.
+    """
+    streams = {}
+    for turn in log:
+        if turn.game not in streams:
+            streams[turn.game] = ({4: bytearray(), 6: bytearray()},
+                                  {4: bytearray(), 6: bytearray()})
+        if turn.granted:
+            streams[turn.game][turn.player][turn.sides] += bytes(turn.outcomes)
+    return {game: tuple({sides: bytes(outcomes) for sides, outcomes in player.items()}
+                        for player in pair)
+            for game, pair in streams.items()}
+
+FALLBACK_BLOCK_SIZE = 16  # Most games need few dice beyond their streams.
+
+def _fallback(seed, player, sides):
+    return FairDice(sides, '{0}/{1}/{2}'.format(seed, player, sides),
+                    FALLBACK_BLOCK_SIZE)
+
+def replay_dice(streams, seed=None):
+    """Return a pair of dice selectors for hog.play that replay STREAMS, the
+    dice streams of a game, and roll dice seeded by SEED once they run out.
+
+    >>> import hog
+    >>> from gamelog import GameLog, GameRecorder
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'game.log')
+    >>> with GameRecorder(path) as recorder:
+    ...     winner = hog.play(hog.always_roll(4), hog.always_roll(6), recorder)
+    >>> with GameLog(path) as log:
+    ...     turns, streams = list(log), game_streams(log)[0]
+    >>> with GameRecorder(path) as recorder:
+    ...     hog.play(hog.always_roll(4), hog.always_roll(6), recorder,
+    ...              replay_dice(streams)) == winner
+    True
+    >>> with GameLog(path) as log:
+    ...     [turn._replace(game=0) for turn in list(log)[len(turns):]] == turns
+    True
+    """
+    selectors = []
+    for player, stream in enumerate(streams):
+        dice = {sides: ReplayDice(sides, stream[sides], _fallback(seed, player, sides))
+                for sides in (4, 6)}
+        def select(score, opponent_score, dice=dice):
+            return dice[dice_sides(score + opponent_score)]
+        selectors.append(select)
+    return tuple(selectors)
+
+def replay_many(strategy0, strategy1, streams, goal=100, seed=None):
+    """Replay the games whose dice streams are listed in STREAMS with
+    STRATEGY0 and STRATEGY1, and return an array of their winners, like
+    batch.play_many.
+
+    Game i rolls dice seeded by '{SEED}/{i}' once its streams run out, so it
+    has the same winner as hog.play with replay_dice(STREAMS[i], '{SEED}/{i}').
+
+    >>> import hog
+    >>> from batch import play_many
+    >>> from gamelog import GameLog, GameRecorder
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'games.log')
+    >>> with GameRecorder(path) as recorder:
+    ...     winners = play_many(hog.final_strategy, hog.always_roll(5), 1000,
+    ...                         seed=61, recorder=recorder)
+    >>> with GameLog(path) as log:
+    ...     streams = list(game_streams(log).values())
+    >>> replay_many(hog.final_strategy, hog.always_roll(5), streams) == winners
+    True
+    >>> counterfactual = replay_many(hog.always_roll(5), hog.always_roll(5),
+    ...                              streams, seed=61)
+    >>> counterfactual[7] == hog.play(hog.always_roll(5), hog.always_roll(5),
+    ...                               dice=replay_dice(streams[7], '61/7'))
+    True
+    """
+    tables = (strategy_table(strategy0, goal), strategy_table(strategy1, goal))
+    n_games = len(streams)
+    outcomes = tuple({sides: [game[who][sides] for game in streams] for sides in (4, 6)}
+                     for who in (0, 1))
+    positions = tuple({sides: [0] * n_games for sides in (4, 6)} for who in (0, 1))
+    fallbacks = {}
+    rules = rule_tables(goal)
+    allowed_dice, sides_of, free_bacon = (rules.allowed_dice, rules.dice_sides,
+                                          rules.free_bacon)
+    ones_lose, touchdown = rules.ones_lose, rules.touchdown
+    scores = ([0] * n_games, [0] * n_games)
+    winners = array('b', bytes(n_games))
+
+    active = range(n_games)
+    who = 0
+    while active:
+        table, my_outcomes, my_positions = tables[who], outcomes[who], positions[who]
+        mine, theirs = scores[who], scores[1 - who]
+        still_playing = []
+        for game in active:
+            score, opponent_score = mine[game], theirs[game]
+            total = score + opponent_score
+            num_rolls = table[score * goal + opponent_score]
+
+            if num_rolls > allowed_dice[total]:       # Hog Tied
+                num_rolls = allowed_dice[total]
+
+            if num_rolls == 0:                        # Free Bacon
+                points = free_bacon[opponent_score]
+            else:
+                sides = sides_of[total]               # Hog Wild
+                stream = my_outcomes[sides][game]
+                start = my_positions[sides][game]
+                end = start + num_rolls
+                my_positions[sides][game] = end
+                rolls = stream[start:end]
+                if end > len(stream):
+                    key = (game, who, sides)
+                    if key not in fallbacks:
+                        fallbacks[key] = _fallback('{0}/{1}'.format(seed, game),
+                                                   who, sides)
+                    rolls = list(rolls) + fallbacks[key].roll_many(
+                        end - max(start, len(stream)))
+                points = sum(rolls)
+                if 1 in rolls and ones_lose[score]:   # Pig Out unless 49ers
+                    points = 1
+                points = touchdown[points]            # Touchdown
+
+            score += points
+            mine[game] = score
+            if score >= goal:
+                winners[game] = who
+            else:
+                still_playing.append(game)
+        active = still_playing
+        who = 1 - who
+    return winners
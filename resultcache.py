@@ -0,0 +1,118 @@
+"""A cache on disk of the win rates of strategies against each other.
+
+A result is addressed by its content: a hash of the fingerprints of the two
+compiled strategies (see compiled.py), the fingerprint of the HogRules of the
+games and the method that computed it.  The same strategies written as
+different functions, or compiled in another process, find the same result.
+
+Exact results never change, so they are kept forever.  Sampled results are
+kept as counts of wins and games, so later evaluations can use them as they
+are or add more games to them.  When the cache holds more than MAX_ENTRIES
+sampled results, those used least recently are evicted.
+
+Results are kept in memory and written to the file only by save, or when a
+cache used as a context manager is closed, so that a sweep that adds many
+results rewrites the file once rather than once per result.
+"""
+
+from hashlib import sha256
+import json
+import os
+
+MAX_ENTRIES = 10000
+
+def result_key(first, second, rules, method):
+    """Return the cache key of the results of METHOD for the strategies with
+    fingerprints FIRST and SECOND under the HogRules RULES.
+
+    >>> from rules import HogRules
+    >>> result_key('a', 'b', HogRules(), 'exact') == result_key('a', 'b', HogRules(100), 'exact')
+    True
+    >>> result_key('a', 'b', HogRules(), 'exact') == result_key('b', 'a', HogRules(), 'exact')
+    False
+    """
+    content = '/'.join([first, second, rules.fingerprint(), method])
+    return sha256(content.encode()).hexdigest()[:32]
+
+class ResultCache:
+    """The results kept in the JSON file at PATH, holding at most MAX_ENTRIES
+    sampled results.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'results.json')
+    >>> with ResultCache(path, max_entries=2) as cache:
+    ...     cache.put_exact('e', 0.5)
+    ...     for key in 'abc':
+    ...         cache.add_samples(key, 30, 100)
+    ...     cache.add_samples('c', 70, 100)
+    >>> cache = ResultCache(path, max_entries=2)
+    >>> cache.exact('e'), cache.samples('a'), cache.samples('c')
+    (0.5, (0, 0), (100, 200))
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path, self.max_entries = path, max_entries
+        self.entries = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as cache_file:
+                self.entries = json.load(cache_file)
+        self.clock = max([entry.get('used', 0) for entry in self.entries.values()],
+                         default=0)
+        self.changed = False
+
+    def exact(self, key):
+        """Return the exact result stored under KEY, or None."""
+        entry = self._use(key)
+        return entry['exact'] if entry is not None and 'exact' in entry else None
+
+    def put_exact(self, key, rate):
+        """Store the exact win rate RATE under KEY."""
+        self.entries[key] = {'exact': rate}
+        self.changed = True
+
+    def samples(self, key):
+        """Return the (wins, games) sampled under KEY, or (0, 0)."""
+        entry = self._use(key)
+        if entry is None or 'games' not in entry:
+            return 0, 0
+        return entry['wins'], entry['games']
+
+    def add_samples(self, key, wins, games):
+        """Add WINS out of GAMES more sampled games to the result under KEY."""
+        old_wins, old_games = self.samples(key)
+        self.entries[key] = {'wins': old_wins + wins, 'games': old_games + games}
+        self._use(key)
+        self.changed = True
+
+    def save(self):
+        """Evict the sampled results used least recently beyond MAX_ENTRIES
+        and write the cache to its file, if it has changed."""
+        if not self.changed:
+            return
+        sampled = [key for key, entry in self.entries.items() if 'games' in entry]
+        if len(sampled) > self.max_entries:
+            sampled.sort(key=lambda key: self.entries[key]['used'])
+            for key in sampled[:len(sampled) - self.max_entries]:
+                del self.entries[key]
+        if self.path is not None:
+            with open(self.path + '.tmp', 'w') as cache_file:
+                json.dump(self.entries, cache_file, indent=0, sort_keys=True)
+            os.replace(self.path + '.tmp', self.path)
+        self.changed = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
+
+    def _use(self, key):
+        """Return the entry under KEY, marking it as the most recently used."""
+        entry = self.entries.get(key)
+        if entry is not None and 'games' in entry:
+            self.clock += 1
+            entry['used'] = self.clock
+        return entry
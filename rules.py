@@ -0,0 +1,174 @@
+"""The rules of Hog that depend only on the scores, as lookup tables.
+
+Hog Tied and Hog Wild depend on the sum of the two scores, and Free Bacon
+(with Touchdown) on the opponent's score.  Instead of computing % 10, % 7 and
+// 10 for every turn, the simulator, the strategies and the solvers index the
+tables of the RuleTables for their goal, which are built once per goal and
+shared by all of them.
+
+A HogRules object defines a variant of the game, with its own goal, dice and
+rules, and builds the tables of that variant.  The functions below apply the
+standard rules.
+"""
+
+from collections import namedtuple
+
+MAX_NUM_ROLLS = 10
+
+class HogRules(namedtuple('HogRules', ['goal', 'max_dice', 'sides', 'wild_sides',
+                                       'hog_tied', 'hog_wild', 'forty_niners',
+                                       'touchdown', 'pig_out'])):
+    """A variant of Hog.
+
+    goal:          The score that ends a game.
+    max_dice:      The most dice a player may roll.
+    sides:         The sides of the usual dice.
+    wild_sides:    The sides of the dice under Hog Wild.
+    hog_tied:      The ones digit of a score sum that allows only one die, or
+                   None to turn Hog Tied off.
+    hog_wild:      The number whose multiples as score sums bring out the
+                   Hog Wild dice, or None to turn Hog Wild off.
+    forty_niners:  The score from which rolling a 1 does not pig out, or None
+                   to turn the 49ers rule off.
+    touchdown:     The number whose multiples as turn scores earn a bonus of
+                   that fraction of the turn score, or None to turn Touchdown
+                   off.
+    pig_out:       Whether rolling any 1 scores just one point.
+
+    Free Bacon is always on, so every turn scores at least one point.
+
+    >>> HogRules().dice_sides(14), HogRules(hog_wild=None).dice_sides(14)
+    (4, 6)
+    >>> HogRules(touchdown=None).free_bacon(50), HogRules().free_bacon(50)
+    (6, 7)
+    """
+
+    def __new__(cls, goal=100, max_dice=MAX_NUM_ROLLS, sides=6, wild_sides=4,
+                hog_tied=7, hog_wild=7, forty_niners=49, touchdown=6,
+                pig_out=True):
+        return super().__new__(cls, goal, max_dice, sides, wild_sides, hog_tied,
+                               hog_wild, forty_niners, touchdown, pig_out)
+
+    def allowed_dice(self, score_sum):
+        """Return the most dice allowed when the scores add up to SCORE_SUM."""
+        if self.hog_tied is not None and score_sum % 10 == self.hog_tied:
+            return 1
+        return self.max_dice
+
+    def dice_sides(self, score_sum):
+        """Return the sides of the dice rolled when the scores add up to
+        SCORE_SUM."""
+        if self.hog_wild is not None and score_sum % self.hog_wild == 0:
+            return self.wild_sides
+        return self.sides
+
+    def bonus(self, points):
+        """Return the turn score POINTS after applying the Touchdown rule."""
+        if self.touchdown is not None and points % self.touchdown == 0:
+            return points + points // self.touchdown
+        return points
+
+    def bacon(self, opponent_score):
+        """Return the points of Free Bacon against OPPONENT_SCORE, before the
+        Touchdown rule."""
+        return 1 + opponent_score // 10
+
+    def free_bacon(self, opponent_score):
+        """Return the turn score for rolling zero dice against OPPONENT_SCORE,
+        including the Touchdown rule."""
+        return self.bonus(self.bacon(opponent_score))
+
+    def ones_lose(self, score):
+        """Return whether rolling a 1 pigs out for a player with SCORE."""
+        return self.pig_out and score != self.forty_niners
+
+    def tables(self):
+        """Return the RuleTables of these rules, building them on first use."""
+        if self not in _tables:
+            sums, indices = range(3 * self.goal), range(2 * self.goal)
+            largest = self.max_dice * max(self.sides, self.wild_sides)
+            _tables[self] = RuleTables(self.goal,
+                                       tuple(map(self.allowed_dice, sums)),
+                                       tuple(map(self.dice_sides, sums)),
+                                       tuple(map(self.free_bacon, indices)),
+                                       tuple(map(self.ones_lose, range(self.goal))),
+                                       tuple(map(self.bonus, range(largest + 1))))
+        return _tables[self]
+
+    def fingerprint(self):
+        """Return a short hex string that identifies these rules.
+
+        >>> HogRules().fingerprint() == HogRules(100).fingerprint()
+        True
+        >>> HogRules().fingerprint() == HogRules(pig_out=False).fingerprint()
+        False
+        """
+        from hashlib import sha256
+        return sha256(repr(tuple(self)).encode()).hexdigest()[:16]
+
+RuleTables = namedtuple('RuleTables', ['goal', 'allowed_dice', 'dice_sides',
+                                       'free_bacon', 'ones_lose', 'touchdown'])
+RuleTables.__doc__ = """The rules for GOAL as tuples: ALLOWED_DICE and
+DICE_SIDES indexed by score sum, covering every sum below 3 * GOAL, which
+includes the sums after a turn of Free Bacon; FREE_BACON indexed by opponent
+score, below 2 * GOAL; ONES_LOSE indexed by the score of the player rolling,
+and TOUCHDOWN by the turn score before the Touchdown rule."""
+
+_tables = {}
+
+STANDARD = HogRules()   # The rules of Hog as in hog_rules.txt.
+
+def touchdown(points):
+    """Return POINTS after applying the Touchdown rule.
+
+    >>> touchdown(12), touchdown(13), touchdown(1)
+    (14, 13, 1)
+    """
+    return STANDARD.bonus(points)
+
+def bacon(opponent_score):
+    """Return the points of Free Bacon against OPPONENT_SCORE, before the
+    Touchdown rule.
+
+    >>> bacon(50), free_bacon(50)
+    (6, 7)
+    """
+    return STANDARD.bacon(opponent_score)
+
+def free_bacon(opponent_score):
+    """Return the turn score for rolling zero dice against OPPONENT_SCORE,
+    including the Touchdown rule.
+
+    >>> free_bacon(34), free_bacon(7), free_bacon(50)
+    (4, 1, 7)
+    """
+    return STANDARD.free_bacon(opponent_score)
+
+def allowed_dice(score_sum):
+    """Return the most dice allowed when the scores add up to SCORE_SUM: just
+    one under Hog Tied, when SCORE_SUM ends in a 7.
+
+    >>> allowed_dice(17), allowed_dice(16)
+    (1, 10)
+    """
+    return STANDARD.allowed_dice(score_sum)
+
+def dice_sides(score_sum):
+    """Return the sides of the dice rolled when the scores add up to SCORE_SUM:
+    four under Hog Wild, when SCORE_SUM is a multiple of 7 (including 0).
+
+    >>> dice_sides(0), dice_sides(21), dice_sides(20)
+    (4, 4, 6)
+    """
+    return STANDARD.dice_sides(score_sum)
+
+def rule_tables(goal=100):
+    """Return the RuleTables of the standard rules for GOAL.
+
+    >>> tables = rule_tables(100)
+    >>> tables.allowed_dice[27], tables.dice_sides[28], tables.free_bacon[52]
+    (1, 4, 7)
+    >>> rule_tables(100) is tables
+    True
+    """
+    return HogRules(goal).tables()
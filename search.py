@@ -0,0 +1,143 @@
+"""Racing searches for the best arguments of a strategy factory.
+
+Instead of giving every candidate the same number of games, successive halving
+plays a round of games for every candidate still in the running, drops the
+worse half, and doubles the games per candidate for the next round.  Any
+candidate whose confidence interval lies entirely below that of the current
+leader is dropped as well, so clearly worse arguments stop costing games
+early, and the close contenders get most of the games.
+
+Candidates are tuples of arguments, so a search can cover a grid over several
+parameters at once, such as the margin and number of dice of
+make_comeback_strategy.
+"""
+
+from itertools import product
+import random
+
+from parallel import SHARD_SIZE, fingerprint, portable, submit_match
+from resultcache import result_key
+from rules import HogRules
+from stats import RunningStats
+
+def grid(*bounds):
+    """Return every tuple of integers between the (lower, upper) pairs of
+    BOUNDS, inclusive.
+
+    >>> grid((1, 2), (5, 6))
+    [(1, 5), (1, 6), (2, 5), (2, 6)]
+    """
+    return list(product(*[range(lower, upper + 1) for lower, upper in bounds]))
+
+def successive_halving(make_strategy, candidates, baseline, goal=100,
+                       num_samples=100, eta=2, max_rounds=8, seed=None,
+                       executor=None, confidence=0.95, common=False, store=None,
+                       cache=None):
+    """Race the strategies MAKE_STRATEGY(*args) for each args in CANDIDATES
+    against BASELINE and return (best_args, estimates).
+
+    The first round plays NUM_SAMPLES games per seating for every candidate.
+    After each round, only the best 1/ETA of the candidates (and none whose
+    interval lies below the leader's) go on to the next round, which plays
+    ETA times as many games.  ESTIMATES maps each candidate to the Estimate of
+    its win rate from all the games it played.
+
+    With COMMON, every candidate plays the same dice in each round (common
+    random numbers), so differences between candidates are less noisy, at the
+    cost of seeding separate random streams for every game.
+
+    Candidates whose strategies compile to the same table would play the same
+    dice, so only the first of them races, and they all share its estimate.
+
+    With a checkpoint.ResultStore STORE, the games of every round are stored,
+    and a race run again with the same SEED replays none of the games it has
+    already stored, and reaches the same results.
+
+    With a resultcache.ResultCache CACHE, the games played are added to the
+    cache once the race has finished, except those found in STORE.  Without
+    a STORE, each candidate starts with the games cached for it against
+    BASELINE, and each round plays only the games it still lacks to have
+    played as many as it would have by the end of that round without the
+    cache.  A race driven by a STORE ignores the cached games, which would
+    change the candidates that survive each round.
+
+    >>> best, estimates = successive_halving(
+    ...     lambda n: (lambda score, opponent_score: n), grid((1, 6)),
+    ...     lambda score, opponent_score: 5, seed=61)
+    >>> best in [(4,), (5,), (6,)], estimates[1,].samples < estimates[best].samples
+    (True, True)
+    >>> from resultcache import ResultCache
+    >>> cache = ResultCache(None)
+    >>> def race():
+    ...     return successive_halving(lambda n: (lambda score, opponent_score: n),
+    ...                               grid((4, 6)), lambda score, opponent_score: 5,
+    ...                               seed=61, cache=cache)
+    >>> best, estimates = race()
+    >>> again, cached = race()     # Plays no games.
+    >>> again == best, [cached[args].samples == estimates[args].samples
+    ...                 for args in grid((4, 6))]
+    (True, [True, True, True])
+
+    Asking for 11 dice is asking for 10, so only (10,) races, and its games
+    are cached once.
+
+    >>> cache = ResultCache(None)
+    >>> best, estimates = successive_halving(
+    ...     lambda n: (lambda score, opponent_score: n), grid((10, 11)),
+    ...     lambda score, opponent_score: 5, seed=61, cache=cache)
+    >>> best, estimates[11,].samples, [games for _, games in
+    ...                                map(cache.samples, cache.entries)]
+    ((10,), 200, [200])
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    strategies = {args: portable(make_strategy(*args), goal) for args in candidates}
+    baseline = portable(baseline, goal)
+    prints = {args: fingerprint(strategy, goal) for args, strategy in strategies.items()}
+    racers = {}     # The first candidate with each fingerprint.
+    for args in candidates:
+        racers.setdefault(prints[args], args)
+    alive = list(racers.values())
+    stats = {args: RunningStats() for args in alive}
+    played = dict.fromkeys(alive, (0, 0))   # Wins and games not found in STORE.
+    keys = {}
+    if cache is not None:
+        baseline_print = fingerprint(baseline, goal)
+        method = 'sampled/{0:d}/0'.format(common)
+        for args in alive:
+            keys[args] = result_key(prints[args], baseline_print, HogRules(goal), method)
+            if store is None:
+                stats[args].add_wins(*cache.samples(keys[args]))
+
+    target = 0      # Games each candidate in the running has played by now.
+    for round_number in range(max_rounds):
+        target += 2 * num_samples
+        round_seed = '{0}/{1}'.format(seed, round_number)
+        matches = {}
+        for args in alive:
+            games = (target - stats[args].count + 1) // 2   # Per seating.
+            if games > 0:
+                matches[args] = submit_match(strategies[args], baseline, games,
+                                             goal, round_seed, executor,
+                                             SHARD_SIZE, common,
+                                             key=(prints[args],), store=store)
+        for args, match in matches.items():
+            stats[args].add_wins(match.wins(), 2 * match.num_samples)
+            wins, games = played[args]
+            played[args] = wins + match.played[0], games + match.played[1]
+        alive.sort(key=lambda args: stats[args].mean, reverse=True)
+        if len(alive) == 1:
+            break
+        leader = stats[alive[0]].estimate(confidence)
+        keep = max(1, -(-len(alive) // eta))
+        alive = [args for args in alive[:keep]
+                 if stats[args].estimate(confidence).high >= leader.low]
+        num_samples *= eta
+
+    if cache is not None:
+        for args, (wins, games) in played.items():
+            if games:
+                cache.add_samples(keys[args], wins, games)
+    estimates = {args: stats[racers[prints[args]]].estimate(confidence)
+                 for args in candidates}
+    return alive[0], estimates
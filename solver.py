@@ -0,0 +1,101 @@
+"""Optimal strategies for Hog, found by value iteration.
+
+The value of a state is the chance that the player about to move wins from
+there.  Each sweep of value iteration replaces the value of every state below
+the goal with the best value over all allowed numbers of dice, using the turn
+transition kernel from kernel.py.
+
+Sweeps visit states in decreasing order of the sum of the two scores.  Every
+turn adds at least one point, so each state only depends on states with a
+larger sum, which a sweep has already updated.  The first sweep therefore
+reaches the fixed point and the second one confirms it with a residual of 0.
+
+The solved strategy is returned as a CompiledStrategy.
+"""
+
+from array import array
+from collections import namedtuple
+
+from compiled import CompiledStrategy, strategy_table
+from kernel import transition_kernel
+from rules import HogRules
+
+Solution = namedtuple('Solution', ['strategy', 'win_chance', 'iterations', 'residuals'])
+
+def _states(goal):
+    """Return every (score, opponent_score) pair below GOAL in decreasing
+    order of their sum."""
+    return [(a, total - a)
+            for total in range(2 * goal - 2, -1, -1)
+            for a in range(max(0, total - goal + 1), min(total, goal - 1) + 1)]
+
+def solve(opponent=None, goal=100, tolerance=1e-12, max_iterations=10,
+          rules=None):
+    """Return the Solution that maximizes the chance of winning against
+    OPPONENT from every state, or the optimal self-play strategy if OPPONENT
+    is None, in a game to GOAL under the standard rules or under the HogRules
+    RULES, if given.
+
+    The Solution holds the compiled strategy, the chance of winning as the first
+    player, the number of sweeps and the largest change in value (residual)
+    after each sweep.  Iteration stops once the residual is at most TOLERANCE.
+
+    >>> solution = solve(goal=20)
+    >>> solution.iterations, solution.residuals[-1]
+    (2, 0.0)
+    >>> round(solution.win_chance, 4)
+    0.525
+    """
+    if rules is None:
+        rules = HogRules(goal)
+    goal = rules.goal
+    states = _states(goal)
+    kernel = transition_kernel(rules).choices
+    choices = {(a, b): list(enumerate(kernel[a * goal + b])) for a, b in states}
+    if opponent is not None:
+        opponent_table = strategy_table(opponent, goal, rules.max_dice)
+        responses = {}
+        for a, b in states:
+            options = kernel[b * goal + a]
+            num_rolls = min(opponent_table[b * goal + a], len(options) - 1)
+            responses[a, b] = options[num_rolls]
+
+    # mine[a * goal + b]: chance to win when about to move with a against b.
+    # theirs[a * goal + b]: chance to win with a against b when the opponent
+    # (following OPPONENT) is about to move.
+    mine = [0.0] * (goal * goal)
+    theirs = [0.0] * (goal * goal)
+    table = array('B', bytes(goal * goal))
+    residuals = []
+    while len(residuals) < max_iterations:
+        residual = 0.0
+        for a, b in states:
+            index = a * goal + b
+            if opponent is not None:
+                chance = 0.0
+                for points, p in responses[a, b]:
+                    if b + points < goal:
+                        chance += p * mine[index + points]
+                residual = max(residual, abs(chance - theirs[index]))
+                theirs[index] = chance
+
+            best_rolls, best_chance = 0, -1.0
+            for num_rolls, outcomes in choices[a, b]:
+                chance = 0.0
+                for points, p in outcomes:
+                    if a + points >= goal:
+                        chance += p
+                    elif opponent is None:
+                        chance += p * (1 - mine[b * goal + a + points])
+                    else:
+                        chance += p * theirs[index + points * goal]
+                if chance > best_chance:
+                    best_rolls, best_chance = num_rolls, chance
+            residual = max(residual, abs(best_chance - mine[index]))
+            mine[index] = best_chance
+            table[index] = best_rolls
+        residuals.append(residual)
+        if residual <= tolerance:
+            break
+    return Solution(CompiledStrategy(table, goal), mine[0], len(residuals),
+                    residuals)
@@ -0,0 +1,156 @@
+"""Running statistics and stopping rules for sampled averages.
+
+RunningStats keeps the mean and variance of a stream of samples with
+Welford's algorithm, so samples never need to be stored.  Its estimate is an
+Estimate: a float equal to the mean that also carries a confidence interval
+and the number of samples behind it.
+
+Two stopping rules decide when a stream has been sampled enough: a maximum
+width for the confidence interval, and a sequential probability ratio test
+(SPRT) for samples that are 0 or 1, such as whether a game was won.
+"""
+
+from math import log, sqrt
+
+class Estimate(float):
+    """A sampled average, with the interval LOW to HIGH that contains the true
+    average with the chance CONFIDENCE, computed from SAMPLES samples.
+
+    >>> rate = Estimate(0.625, 0.6, 0.65, 400)
+    >>> rate > 0.6, rate.samples
+    (True, 400)
+    >>> rate
+    0.625 (0.600 to 0.650, 400 samples)
+    """
+
+    def __new__(cls, mean, low, high, samples, confidence=0.95):
+        estimate = super().__new__(cls, mean)
+        estimate.low, estimate.high = low, high
+        estimate.samples = samples
+        estimate.confidence = confidence
+        return estimate
+
+    @property
+    def width(self):
+        return self.high - self.low
+
+    def __repr__(self):
+        return '{0} ({1:.3f} to {2:.3f}, {3} samples)'.format(
+            float(self), self.low, self.high, self.samples)
+
+    __str__ = __repr__
+
+def z_score(confidence):
+    """Return how many standard errors on each side of the mean a normal
+    confidence interval with chance CONFIDENCE spans.
+
+    >>> round(z_score(0.95), 2)
+    1.96
+    """
+    from statistics import NormalDist   # Slow to import, and rarely needed.
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+class RunningStats:
+    """The count, mean and variance of a stream of samples (Welford).
+
+    >>> stats = RunningStats()
+    >>> for x in [2, 4, 4, 4, 5, 5, 7, 9]:
+    ...     stats.add(x)
+    >>> stats.count, stats.mean, round(stats.variance, 4)
+    (8, 5.0, 4.5714)
+    >>> other = RunningStats()
+    >>> other.add_many(3, 2/3, 2/3)   # Three samples: 0, 1 and 1.
+    >>> stats.merge(other)
+    >>> stats.count, round(stats.mean, 4)
+    (11, 3.8182)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0   # Sum of squared differences from the mean.
+
+    def add(self, x):
+        """Add one sample X."""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def add_many(self, count, mean, variance):
+        """Add COUNT samples with the given MEAN and (population) VARIANCE."""
+        if count:
+            other = RunningStats()
+            other.count, other.mean, other.m2 = count, mean, variance * count
+            self.merge(other)
+
+    def add_wins(self, wins, games):
+        """Add GAMES samples that are 1 for WINS of them and 0 otherwise."""
+        if games:
+            rate = wins / games
+            self.add_many(games, rate, rate * (1 - rate))
+
+    def merge(self, other):
+        """Add all the samples summarized by the RunningStats OTHER."""
+        count = self.count + other.count
+        if not count:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self):
+        """The sample variance of the samples so far."""
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    def half_width(self, confidence=0.95):
+        """Half the width of the confidence interval around the mean."""
+        if not self.count:
+            return float('inf')
+        return z_score(confidence) * sqrt(self.variance / self.count)
+
+    def estimate(self, confidence=0.95):
+        """Return the mean so far as an Estimate."""
+        half_width = self.half_width(confidence)
+        return Estimate(self.mean, self.mean - half_width,
+                        self.mean + half_width, self.count, confidence)
+
+def sprt(successes, trials, delta, alpha=0.05, beta=0.05, p=0.5):
+    """Return the decision of a sequential probability ratio test between a
+    success chance of P - DELTA and P + DELTA after SUCCESSES of TRIALS.
+
+    The result is 1 if the chance is above P, -1 if it is below P, and 0 if
+    more trials are needed.  ALPHA and BETA are the chances of deciding 1 and
+    -1 wrongly.
+
+    >>> sprt(60, 100, 0.05), sprt(50, 100, 0.05), sprt(30, 100, 0.05)
+    (1, 0, -1)
+    """
+    low, high = p - delta, p + delta
+    ratio = (successes * log(high / low) +
+             (trials - successes) * log((1 - high) / (1 - low)))
+    if ratio >= log((1 - beta) / alpha):
+        return 1
+    if ratio <= log(beta / (1 - alpha)):
+        return -1
+    return 0
+
+def should_stop(stats, width=None, confidence=0.95, sprt_delta=None,
+                min_samples=30):
+    """Return whether STATS has enough samples: the confidence interval is no
+    wider than WIDTH, or the SPRT with SPRT_DELTA has decided.  Samples must
+    be 0 or 1 to use the SPRT.
+    """
+    if stats.count < min_samples:
+        return False
+    if width is not None and 2 * stats.half_width(confidence) <= width:
+        return True
+    if sprt_delta is not None:
+        alpha = (1 - confidence) / 2
+        successes = round(stats.mean * stats.count)
+        return sprt(successes, stats.count, sprt_delta, alpha, alpha) != 0
+    return False
@@ -0,0 +1,143 @@
+"""Round-robin tournaments between many strategies.
+
+Every pair of strategies plays the same number of games in both seat orders.
+All matches are submitted at once, so an executor can play them in parallel.
+Finished matches are cached in a JSON file under the fingerprints of the two
+compiled strategies, so adding a strategy to a tournament only plays the
+matches of the new strategy.
+
+The results are a matrix of win rates and two ratings computed from it: the
+Bradley-Terry strength of each strategy, and the same strengths on the Elo
+scale, where a difference of 400 points means 10 to 1 odds of winning.
+"""
+
+from collections import namedtuple
+from math import log10
+import json
+import os
+
+from compiled import compile_strategy
+from parallel import StrategySpec, submit_match
+
+Tournament = namedtuple('Tournament', ['names', 'win_rates', 'strengths', 'elo',
+                                       'games'])
+
+def _compile(strategy, goal):
+    if isinstance(strategy, StrategySpec):
+        strategy = strategy.resolve()
+    return compile_strategy(strategy, goal)
+
+def _load(cache_path):
+    if cache_path is None or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path) as cache_file:
+        return json.load(cache_file)
+
+def _save(cache, cache_path):
+    if cache_path is not None:
+        with open(cache_path + '.tmp', 'w') as cache_file:
+            json.dump(cache, cache_file, indent=0, sort_keys=True)
+        os.replace(cache_path + '.tmp', cache_path)
+
+def round_robin(strategies, num_samples=1000, goal=100, seed=None,
+                executor=None, cache_path=None):
+    """Play a round-robin tournament between STRATEGIES, a dict from names to
+    strategies (or StrategySpecs), and return a Tournament.
+
+    Each pair plays NUM_SAMPLES games in each seat order.  Finished matches
+    are read from and added to the JSON file at CACHE_PATH, if given, unless
+    SEED is None: the results of random dice cannot be played again, so they
+    are not cached.  In the result, win_rates[i][j] is the rate at which
+    strategy i beat strategy j.
+
+    >>> roll = lambda n: (lambda score, opponent_score: n)
+    >>> result = round_robin({'one': roll(1), 'five': roll(5), 'ten': roll(10)},
+    ...                      500, seed=61)
+    >>> result.names, result.win_rates[1][0] > 0.9
+    (['one', 'five', 'ten'], True)
+    >>> max(result.names, key=result.elo.get)
+    'five'
+    """
+    if seed is None:
+        cache_path = None
+    names = list(strategies)
+    compiled = [_compile(strategies[name], goal) for name in names]
+    prints = [strategy.fingerprint() for strategy in compiled]
+    cache = _load(cache_path)
+
+    def key(i, j):
+        return '/'.join([prints[i], prints[j], str(goal), str(num_samples),
+                         str(seed)])
+
+    pending = {}
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            if key(i, j) not in cache and key(j, i) not in cache:
+                pending[key(i, j)] = submit_match(
+                    compiled[i], compiled[j], num_samples, goal, seed,
+                    executor, key=(prints[i], prints[j]))
+    for match_key, match in pending.items():
+        cache[match_key] = match.wins()
+    if pending:
+        _save(cache, cache_path)
+
+    games = 2 * num_samples
+    wins = [[0] * len(names) for _ in names]
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            if key(i, j) in cache:
+                wins[i][j] = cache[key(i, j)]
+            else:
+                wins[i][j] = games - cache[key(j, i)]
+            wins[j][i] = games - wins[i][j]
+    win_rates = [[None if i == j else wins[i][j] / games
+                  for j in range(len(names))] for i in range(len(names))]
+    strengths = bradley_terry(wins, games)
+    elo = {name: 1500 + 400 * log10(strength)
+           for name, strength in zip(names, strengths)}
+    return Tournament(names, win_rates, dict(zip(names, strengths)), elo, games)
+
+def bradley_terry(wins, games, prior=0.5, tolerance=1e-10, max_iterations=10000):
+    """Return the Bradley-Terry strength of each player, given that player i
+    won WINS[i][j] of GAMES games against player j.
+
+    Strengths are fitted with the minorization-maximization algorithm and
+    scaled so that their geometric mean is 1; player i beats player j with
+    chance strength[i] / (strength[i] + strength[j]).  Every player is given
+    PRIOR extra wins against every other, so a player who won or lost every
+    game still has a finite strength.
+
+    >>> [round(s, 3) for s in bradley_terry([[0, 3], [1, 0]], 4, prior=0)]
+    [1.732, 0.577]
+    """
+    players = range(len(wins))
+    strengths = [1.0] * len(wins)
+    for _ in range(max_iterations):
+        updated = []
+        for i in players:
+            won = sum(wins[i][j] + prior for j in players if j != i)
+            rate = sum((games + 2 * prior) / (strengths[i] + strengths[j])
+                       for j in players if j != i)
+            updated.append(won / rate)
+        scale = 1
+        for strength in updated:
+            scale *= strength ** (1 / len(updated))
+        updated = [strength / scale for strength in updated]
+        change = max(abs(a - b) for a, b in zip(updated, strengths))
+        strengths = updated
+        if change <= tolerance:
+            break
+    return strengths
+
+def print_tournament(result):
+    """Print the win rate matrix and ratings of a Tournament."""
+    width = max(len(name) for name in result.names)
+    print(' ' * (width + 4) + ' '.join('{0:>5}'.format(j)
+                                       for j in range(len(result.names))))
+    for i, (name, row) in enumerate(zip(result.names, result.win_rates)):
+        cells = ['  -  ' if rate is None else '{0:.3f}'.format(rate) for rate in row]
+        print('{0:>2} {1:>{2}} {3}'.format(i, name, width, ' '.join(cells)))
+    print()
+    for name in sorted(result.names, key=result.elo.get, reverse=True):
+        print('{0:>{1}}  Elo {2:7.1f}  strength {3:.3f}'.format(
+            name, width, result.elo[name], result.strengths[name]))
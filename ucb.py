@@ -1,11 +1,15 @@
-"""The ucb module contains functions specific to 61A at UC Berkeley."""
+"""The ucb module contains functions specific to 61A at UC Berkeley.
 
-import code
+Every program that uses main imports this module, so it imports only what
+main and the tracers need.  The modules used by interact are imported when it
+is called, and frames are found with sys._getframe rather than inspect.stack,
+which reads the source of every frame on the stack.
+"""
+
+from collections import deque
 import functools
-import inspect
-import re
-import signal
 import sys
+from time import perf_counter
 
         
 def main(fn):
@@ -19,7 +23,7 @@ def main(fn):
     
     Use this instead of the typical __name__ == "__main__" predicate.
     """
-    if inspect.stack()[1][0].f_locals['__name__'] == '__main__':
+    if sys._getframe(1).f_globals['__name__'] == '__main__':
         args = sys.argv[1:] # Discard the script name from command line
         fn(*args) # Call the main function
     return fn
@@ -57,13 +61,129 @@ def log(message):
     """Print an indented message (used with trace)."""
     if type(message) is not str:
         message = str(message)
-    print(_PREFIX + re.sub('\n', '\n' + _PREFIX, message))
+    print(_PREFIX + message.replace('\n', '\n' + _PREFIX))
+
+
+TRACE_BUFFER_SIZE = 4096    # Number of calls a Tracer remembers.
+
+class Tracer:
+    """A low-overhead alternative to trace for functions called too often to
+    print every call.  A Tracer counts and times every call of the functions
+    it traces, but records only a sample of the calls: every EVERY-th call of
+    each function, or with PROBABILITY, each call with that chance.  Sampled
+    calls go into a ring buffer that keeps only the last SIZE of them, and
+    nothing is formatted or printed until dump is called, or until the
+    program exits when AT_EXIT is true.  For example,
+
+    tracer = Tracer(every=100, at_exit=True)
+    hog.take_turn = tracer.trace(hog.take_turn)
+
+    Each traced function is counted on its own, even when several have the
+    same name, such as the strategies returned by always_roll.  Times include
+    the time of any traced calls they make.
+
+    >>> tracer = Tracer(size=2, every=10)
+    >>> @tracer.trace
+    ... def square(x):
+    ...     return x * x
+    >>> [square(x) for x in range(30)][-1]
+    841
+    >>> tracer.functions[square.__wrapped__][:2]
+    [30, 3]
+    >>> [args for _, args, _, _, _, _ in tracer.events]
+    [(19,), (29,)]
+    >>> def always(n):
+    ...     return tracer.trace(lambda score, opponent_score: n)
+    >>> fives, sixes = always(5), always(6)
+    >>> [fives(0, 0) for _ in range(3)] + [sixes(0, 0)]
+    [5, 5, 5, 6]
+    >>> [tracer.functions[f.__wrapped__][0] for f in (fives, sixes)]
+    [3, 1]
+    """
+
+    def __init__(self, size=TRACE_BUFFER_SIZE, every=1, probability=None,
+                 at_exit=False):
+        self.events = deque(maxlen=size)
+        self.functions = {}     # Calls, sampled calls and seconds, by function.
+        self.every, self.probability = every, probability
+        if at_exit:
+            import atexit
+            atexit.register(self.dump)
+
+    def trace(self, fn):
+        """Return FN wrapped to count, time and sample its calls.  Used as a
+        decorator."""
+        stats = self.functions.setdefault(fn, [0, 0, 0.0])
+        events, every, probability = self.events, self.every, self.probability
+        if probability is not None:
+            from random import random
+        @functools.wraps(fn)
+        def wrapped(*args, **kwds):
+            stats[0] += 1
+            if probability is None:
+                sampled = not stats[0] % every
+            else:
+                sampled = random() < probability
+            start = perf_counter()
+            try:
+                result = fn(*args, **kwds)
+            except BaseException as e:
+                seconds = perf_counter() - start
+                stats[2] += seconds
+                if sampled:
+                    stats[1] += 1
+                    events.append((fn, args, kwds, e, True, seconds))
+                raise
+            seconds = perf_counter() - start
+            stats[2] += seconds
+            if sampled:
+                stats[1] += 1
+                events.append((fn, args, kwds, result, False, seconds))
+            return result
+        return wrapped
+
+    def names(self):
+        """Return a dict from each traced function to its qualified name,
+        followed by its id when another traced function has the same name."""
+        counts = {}
+        for fn in self.functions:
+            counts[fn.__qualname__] = counts.get(fn.__qualname__, 0) + 1
+        return {fn: fn.__qualname__ if counts[fn.__qualname__] == 1 else
+                '{0} at {1:#x}'.format(fn.__qualname__, id(fn))
+                for fn in self.functions}
+
+    def dump(self, file=None, last=None):
+        """Print the calls of each traced function and the seconds spent in
+        them, followed by the LAST sampled calls in the buffer (all of them
+        by default), to FILE or stdout."""
+        names = self.names()
+        print('{0:<30} {1:>10} {2:>10} {3:>12} {4:>10}'.format(
+            'function', 'calls', 'sampled', 'us/call', 'seconds'), file=file)
+        for fn in sorted(self.functions, key=names.get):
+            calls, sampled, seconds = self.functions[fn]
+            mean = seconds / calls if calls else 0.0
+            print('{0:<30} {1:>10} {2:>10} {3:>12.2f} {4:>10.4f}'.format(
+                names[fn], calls, sampled, mean * 1e6, seconds), file=file)
+        events = list(self.events)
+        for fn, args, kwds, result, raised, seconds in events[-(last or len(events)):]:
+            reprs = [repr(e) for e in args]
+            reprs += [repr(k) + '=' + repr(v) for k, v in kwds.items()]
+            outcome = 'exited via ' + repr(result) if raised else '-> ' + repr(result)
+            print('{0}({1}) {2} [{3:.2f} us]'.format(
+                names[fn], ', '.join(reprs), outcome, seconds * 1e6), file=file)
+
+    def clear(self):
+        """Forget all calls counted and sampled so far."""
+        self.events.clear()
+        for stats in self.functions.values():
+            stats[:] = [0, 0, 0.0]
 
 
 def log_current_line():
     """Print information about the current line of code."""
-    frame = inspect.stack()[1]
-    log('Current line: File "{f[1]}", line {f[2]}, in {f[3]}'.format(f=frame))
+    frame = sys._getframe(1)
+    log('Current line: File "{0}", line {1}, in {2}'.format(
+        frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
 
 
 def interact(msg=None):
@@ -75,11 +195,10 @@ def interact(msg=None):
       <Control>-Z <Enter> exists the interactive session and returns to normal
       execution.
     """
-    # use exception trick to pick up the current frame
-    try:
-        raise None
-    except:
-        frame = sys.exc_info()[2].tb_frame.f_back
+    import code
+    import signal
+
+    frame = sys._getframe(1)
 
     # evaluate commands in current namespace
     namespace = frame.f_globals.copy()
@@ -92,8 +211,8 @@ def interact(msg=None):
     signal.signal(signal.SIGINT, handler)
 
     if not msg:
-        _, filename, line, _, _, _ = inspect.stack()[1]
-        msg = 'Interacting at File "{0}", line {1} \n'.format(filename, line)
+        msg = 'Interacting at File "{0}", line {1} \n'.format(
+            frame.f_code.co_filename, frame.f_lineno)
         msg += '    Unix:    <Control>-D continues the program; \n'
         msg += '    Windows: <Control>-Z <Enter> continues the program; \n'
         msg += '    exit() or <Control>-C exits the program'